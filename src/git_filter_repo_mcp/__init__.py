@@ -1,46 +1,86 @@
 """git-filter-repo MCP Server - AI-powered git history rewriting."""
 
-__version__ = "0.1.0"
+import importlib
 
-from .adapter import CommitInfo, FilterResult, GitFilterRepoAdapter
-from .ai_engine import (
-    AICommitEngine,
-    AnthropicProvider,
-    CommitContext,
-    MessageStyle,
-    OllamaProvider,
-    OpenAIProvider,
-    RewriteResult,
-    get_provider,
-)
-from .config import AIConfig, Config, ServerConfig, get_config, reload_config
-from .secrets import SecretFinding, SecretPattern, redact_secret, scan_content
+__version__ = "0.1.0"
 
-__all__ = [
-    # Version
-    "__version__",
+# Public name -> defining submodule. Resolved on first attribute access (PEP 562)
+# so importing the package does not pull in httpx, the regex tables, etc.
+_LAZY_EXPORTS = {
     # Adapter
-    "GitFilterRepoAdapter",
-    "FilterResult",
-    "CommitInfo",
+    "GitFilterRepoAdapter": "adapter",
+    "FilterResult": "adapter",
+    "CommitInfo": "adapter",
+    "CommitTable": "adapter",
+    "pool_stats": "adapter",
     # AI Engine
+    "AICommitEngine": "ai_engine",
+    "MessageStyle": "ai_engine",
+    "CommitContext": "ai_engine",
+    "RewriteResult": "ai_engine",
+    "RewriteCache": "ai_engine",
+    "get_provider": "ai_engine",
+    "OllamaProvider": "ai_engine",
+    "OpenAIProvider": "ai_engine",
+    "AnthropicProvider": "ai_engine",
+    "FallbackProvider": "ai_engine",
+    # Config
+    "Config": "config",
+    "AIConfig": "config",
+    "ServerConfig": "config",
+    "get_config": "config",
+    "reload_config": "config",
+    # Secrets
+    "SecretPattern": "secrets",
+    "SecretFinding": "secrets",
+    "scan_content": "secrets",
+    "scan_stream": "secrets",
+    "redact_secret": "secrets",
+    "redact_spans": "secrets",
+    "redact_findings": "secrets",
+}
+
+__all__ = [
     "AICommitEngine",
-    "MessageStyle",
+    "AIConfig",
+    "AnthropicProvider",
     "CommitContext",
-    "RewriteResult",
-    "get_provider",
+    "CommitInfo",
+    "CommitTable",
+    "Config",
+    "FallbackProvider",
+    "FilterResult",
+    "GitFilterRepoAdapter",
+    "MessageStyle",
     "OllamaProvider",
     "OpenAIProvider",
-    "AnthropicProvider",
-    # Config
-    "Config",
-    "AIConfig",
+    "RewriteCache",
+    "RewriteResult",
+    "SecretFinding",
+    "SecretPattern",
     "ServerConfig",
+    "__version__",
     "get_config",
+    "get_provider",
+    "pool_stats",
+    "redact_findings",
+    "redact_secret",
+    "redact_spans",
     "reload_config",
-    # Secrets
-    "SecretPattern",
-    "SecretFinding",
     "scan_content",
-    "redact_secret",
+    "scan_stream",
 ]
+
+
+def __getattr__(name: str):
+    """Import public names lazily on first access."""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # Cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
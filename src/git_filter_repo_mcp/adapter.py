@@ -1,17 +1,29 @@
 """git-filter-repo adapter - wraps git-filter-repo commands."""
 
-import base64
+import atexit
+import calendar
 import datetime
+import functools
 import json
 import logging
+import multiprocessing
+import os
 import platform
 import re
 import shutil
 import subprocess
 import tempfile
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable
+from typing import TYPE_CHECKING, ClassVar
+
+if TYPE_CHECKING:
+    from typing_extensions import Self  # typing.Self needs Python 3.11
 
 logger = logging.getLogger(__name__)
 
@@ -26,13 +38,143 @@ MAX_PREVIEW_COMMITS = 20
 MAX_FINDINGS_LIMIT = 50
 MAX_FILES_TO_SCAN = 200
 
+# Distinct (tip commit, max_count) git log results kept per adapter
+COMMITS_CACHE_SIZE = 8
+
+# (commit, path) file contents kept per adapter by get_file_at_commit
+FILE_CACHE_SIZE = 2048
+
+# Commit hashes passed per git log invocation by get_many_commit_files
+COMMIT_BATCH_SIZE = 200
+
+# Below this much blob content, pool start-up costs more than scanning serially
+PARALLEL_SCAN_MIN_BYTES = 8 * 1024 * 1024
+
+# --message-callback body (filter-repo wraps it in a function of `message`).
+# Maps old subject -> new message, loaded from stdin and encoded once on the first
+# call so messages are matched as bytes without decoding each one
+MESSAGE_CALLBACK_BODY = """\
+table = globals().get("_replacements")
+if table is None:
+    import json, sys
+    table = globals()["_replacements"] = {
+        old.encode("utf-8"): new.encode("utf-8") for old, new in json.load(sys.stdin).items()
+    }
+return table.get(message.strip(), message)
+"""
+
+# --commit-callback body: original commit hash -> new unix timestamp, from stdin
+COMMIT_DATE_CALLBACK_BODY = """\
+table = globals().get("_date_map")
+if table is None:
+    import json, sys
+    table = globals()["_date_map"] = json.load(sys.stdin)
+new_ts = table.get(commit.original_id.decode()) if commit.original_id else None
+if new_ts is not None:
+    commit.author_date = commit.committer_date = f"{new_ts} +0000".encode()
+"""
+
+_FULL_HASH_RE = re.compile(r"[0-9a-f]{40}")
+
+# Windows path shapes recognised by _normalize_path
+_GITBASH_PATH_RE = re.compile(r"^/([a-zA-Z])/(.*)$")
+_GITBASH_PREFIX_RE = re.compile(r"^/[a-zA-Z]/")
+_DRIVE_PATH_RE = re.compile(r"^[a-zA-Z]:/")
+
 
 def _parse_lines(output: str) -> list[str]:
     """Parse stdout into non-empty lines."""
     return [line for line in output.strip().split("\n") if line]
 
 
-def _safe_int(value: str, default: int = 0) -> int:
+@functools.lru_cache(maxsize=1)
+def _scratch_dir() -> str:
+    """Process-wide directory for filter-repo input files, on tmpfs where available."""
+    shm = "/dev/shm"
+    path = tempfile.mkdtemp(
+        prefix="gfr_", dir=shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else None
+    )
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+def _split_stream(stream, sep: str, chunk_size: int = 1 << 16) -> Iterator[str]:
+    """Yield sep-terminated records from a text stream, reading in chunks."""
+    pending = ""
+    for chunk in iter(functools.partial(stream.read, chunk_size), ""):
+        *records, pending = (pending + chunk).split(sep)
+        yield from records
+    if pending:
+        yield pending
+
+
+def _parse_changed_files(records: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """Pair paths with commits in `git log -z --name-only --format=%x01%H` records."""
+    # git puts a newline before the first path of each commit
+    commit_hash = None
+    first = False
+    for record in records:
+        if record.startswith("\x01"):
+            commit_hash, first = record[1:], True
+        elif commit_hash:
+            if first:
+                record, first = record[1:], False
+            if record:
+                yield commit_hash, record
+
+
+def _parse_commit_records(records: Iterable[str]) -> Iterator[list]:
+    """
+    Group `git log -z --name-only --format=%x01<7 NUL-separated fields>` records.
+
+    Yields the seven fields followed by the list of changed paths, per commit.
+    """
+    parts: list | None = None
+    for record in records:
+        if record.startswith("\x01"):
+            if parts is not None:
+                yield parts
+            parts = [record[1:]]
+        elif parts is None:
+            continue
+        elif len(parts) < 7:
+            parts.append(record)
+            if len(parts) == 7:
+                parts.append([])
+        elif record:
+            # git puts a newline before the first path of each commit
+            parts[7].append(record[1:] if not parts[7] and record.startswith("\n") else record)
+    if parts is not None:
+        yield parts
+
+
+def _parse_git_date(value: str) -> tuple[int, int]:
+    """Split a strict ISO 8601 git date (%aI) into unix seconds and UTC offset seconds."""
+    wall = calendar.timegm(
+        (
+            int(value[0:4]),
+            int(value[5:7]),
+            int(value[8:10]),
+            int(value[11:13]),
+            int(value[14:16]),
+            int(value[17:19]),
+            0,
+            0,
+            0,
+        )
+    )
+    zone = value[19:]
+    if zone in ("", "Z"):
+        return wall, 0
+    if len(zone) != 6 or zone[0] not in "+-":
+        raise ValueError(f"Invalid date: {value}")
+    offset = int(zone[1:3]) * 3600 + int(zone[4:6]) * 60
+    if zone[0] == "-":
+        offset = -offset
+    return wall - offset, offset
+
+
+def _safe_int(value: str | bytes | None, default: int = 0) -> int:
     """Safely parse int from string."""
     try:
         return int(value.strip())
@@ -40,7 +182,57 @@ def _safe_int(value: str, default: int = 0) -> int:
         return default
 
 
-@dataclass
+def _scan_blob(item: tuple[str, str, bytes]) -> list[dict]:
+    """Scan one (commit, path, contents) blob; top-level so worker processes can run it."""
+    from .secrets import scan_content
+
+    commit_hash, file_path, data = item
+    return [
+        {
+            "type": f.pattern_name,
+            "description": f.description,
+            "severity": f.severity,
+            "file": f.file_path,
+            "commit": f.commit_hash[:8],
+            "line": f.line_number,
+            "matched": f.matched_text,
+        }
+        for f in scan_content(data, file_path, commit_hash, include_context=False)
+    ]
+
+
+class StringPool:
+    """Hands out one shared object per distinct string value."""
+
+    def __init__(self):
+        self._strings: dict[str, str] = {}
+        self._lookups = 0
+
+    def intern(self, value: str) -> str:
+        self._lookups += 1
+        return self._strings.setdefault(value, value)
+
+    def stats(self) -> dict[str, int]:
+        return {"unique": len(self._strings), "lookups": self._lookups}
+
+    def clear(self) -> None:
+        self._strings.clear()
+        self._lookups = 0
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+
+# Author/committer names and emails repeat across nearly every commit
+_IDENTITY_POOL = StringPool()
+
+
+def pool_stats() -> dict[str, int]:
+    """Interning statistics for commit identities (for debugging memory use)."""
+    return _IDENTITY_POOL.stats()
+
+
+@dataclass(slots=True, frozen=True)
 class FilterResult:
     """Result of a git-filter-repo operation."""
 
@@ -53,7 +245,7 @@ class FilterResult:
     error: str | None = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CommitInfo:
     """Information about a single commit."""
 
@@ -67,62 +259,369 @@ class CommitInfo:
     files: list[str] = field(default_factory=list)
 
 
+class CommitTable:
+    """
+    Column-oriented (struct-of-arrays) store for large commit lists.
+
+    Hashes are packed as raw bytes, identities are stored once and referenced
+    by index, and message/date/file text lives in one UTF-8 buffer. Rows are
+    materialized as CommitInfo only when indexed.
+    """
+
+    _TEXT_FIELDS = 3  # message, date, files
+
+    def __init__(self, commits: Iterable[CommitInfo] = ()):
+        self._hash_size = 0
+        self._hashes = bytearray()
+        self._identities: list[tuple[str, str]] = []
+        self._identity_index: dict[tuple[str, str], int] = {}
+        self._authors = array("I")
+        self._committers = array("I")
+        self._text = bytearray()
+        self._text_ends = array("Q", [0])
+        self.extend(commits)
+
+    def _identity(self, name: str, email: str) -> int:
+        key = (name, email)
+        index = self._identity_index.get(key)
+        if index is None:
+            index = self._identity_index[key] = len(self._identities)
+            self._identities.append(key)
+        return index
+
+    def _add_text(self, value: str) -> None:
+        self._text += value.encode("utf-8", "surrogateescape")
+        self._text_ends.append(len(self._text))
+
+    def _get_text(self, row: int, column: int) -> str:
+        slot = row * self._TEXT_FIELDS + column
+        start, end = self._text_ends[slot], self._text_ends[slot + 1]
+        return self._text[start:end].decode("utf-8", "surrogateescape")
+
+    def add(
+        self,
+        commit_hash: str,
+        author_name: str,
+        author_email: str,
+        committer_name: str,
+        committer_email: str,
+        message: str,
+        date: str,
+        files: Iterable[str] = (),
+    ) -> None:
+        """Append one commit from its field values."""
+        raw_hash = bytes.fromhex(commit_hash)
+        if not self._hash_size:
+            self._hash_size = len(raw_hash)
+        elif len(raw_hash) != self._hash_size:
+            raise ValueError(f"Mixed hash lengths in commit table: {commit_hash}")
+        self._hashes += raw_hash
+        self._authors.append(self._identity(author_name, author_email))
+        self._committers.append(self._identity(committer_name, committer_email))
+        self._add_text(message)
+        self._add_text(date)
+        self._add_text("\n".join(files))
+
+    def append(self, commit: CommitInfo) -> None:
+        self.add(
+            commit.hash,
+            commit.author_name,
+            commit.author_email,
+            commit.committer_name,
+            commit.committer_email,
+            commit.message,
+            commit.date,
+            commit.files,
+        )
+
+    def extend(self, commits: Iterable[CommitInfo]) -> None:
+        for commit in commits:
+            self.append(commit)
+
+    def __len__(self) -> int:
+        return len(self._authors)
+
+    def hash_at(self, row: int) -> str:
+        start = row * self._hash_size
+        return self._hashes[start : start + self._hash_size].hex()
+
+    def author_counts(self) -> dict[str, int]:
+        """Commits per "name <email>" author, counted on the index column."""
+        # Counter counts in C; the label is formatted once per author, not per commit
+        identities = self._identities
+        return {
+            f"{identities[index][0]} <{identities[index][1]}>": count
+            for index, count in Counter(self._authors).items()
+        }
+
+    def __getitem__(self, row: int) -> CommitInfo:
+        size = len(self)
+        if row < 0:
+            row += size
+        if not 0 <= row < size:
+            raise IndexError("commit table index out of range")
+        author_name, author_email = self._identities[self._authors[row]]
+        committer_name, committer_email = self._identities[self._committers[row]]
+        files = self._get_text(row, 2)
+        return CommitInfo(
+            self.hash_at(row),
+            author_name,
+            author_email,
+            committer_name,
+            committer_email,
+            self._get_text(row, 0),
+            self._get_text(row, 1),
+            files.split("\n") if files else [],
+        )
+
+    def iter_slice(self, start: int = 0, end: int | None = None) -> Iterator[CommitInfo]:
+        """Materialize rows start..end lazily."""
+        for row in range(*slice(start, end).indices(len(self))):
+            yield self[row]
+
+    def __iter__(self) -> Iterator[CommitInfo]:
+        return self.iter_slice()
+
+
+class _CatFileBatch:
+    """
+    Long-running ``git cat-file --batch`` / ``--batch-check`` processes.
+
+    Each lookup is one line on stdin and one response on stdout, instead of a
+    fresh git process per object. The processes start on first use.
+    """
+
+    def __init__(self, repo_path: Path):
+        self.repo_path = repo_path
+        self._processes: dict[str, subprocess.Popen] = {}
+        self._lock = threading.Lock()
+
+    def _process(self, option: str) -> subprocess.Popen:
+        """The running process for option, started (or restarted) as needed."""
+        process = self._processes.get(option)
+        if process is None or process.poll() is not None:
+            process = subprocess.Popen(
+                ["git", "cat-file", option],
+                cwd=self.repo_path,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            self._processes[option] = process
+        return process
+
+    @staticmethod
+    def _read_size(process: subprocess.Popen) -> int | None:
+        """Parse one response header; the object size, or None if it didn't resolve."""
+        # "<oid> <type> <size>", or "<spec> missing" / "<spec> ambiguous"
+        header = process.stdout.readline().rstrip(b"\n").split(b" ")
+        if len(header) != 3 or not header[2].isdigit():
+            return None
+        return int(header[2])
+
+    def _request(self, option: str, spec: str) -> tuple[subprocess.Popen, int] | None:
+        """Send one object spec; return the process and object size, or None."""
+        if "\n" in spec:
+            return None  # Would break the line protocol
+        process = self._process(option)
+        process.stdin.write(spec.encode("utf-8", "surrogateescape") + b"\n")
+        process.stdin.flush()
+        size = self._read_size(process)
+        return None if size is None else (process, size)
+
+    def get_size(self, spec: str) -> int | None:
+        """Object size in bytes, or None if it doesn't resolve."""
+        with self._lock:
+            response = self._request("--batch-check", spec)
+            return None if response is None else response[1]
+
+    def get_blob(self, spec: str) -> bytes | None:
+        """Raw object contents ("<oid>" or "<rev>:<path>"), or None if missing."""
+        with self._lock:
+            response = self._request("--batch", spec)
+            if response is None:
+                return None
+            process, size = response
+            data = process.stdout.read(size + 1)  # Contents plus trailing LF
+            return data[:-1]
+
+    def get_blobs(self, specs: list[str]) -> list[bytes | None]:
+        """Contents for many specs, in order, without a round trip per object."""
+        with self._lock:
+            process = self._process("--batch")
+            valid = [spec for spec in specs if "\n" not in spec]
+            payload = b"".join(spec.encode("utf-8", "surrogateescape") + b"\n" for spec in valid)
+
+            # A thread writes the requests while this one reads responses, so git
+            # never blocks on a full pipe and unpacking overlaps the transfer
+            def write() -> None:
+                try:
+                    process.stdin.write(payload)
+                    process.stdin.flush()
+                except OSError:
+                    pass  # The reader gave up and killed the process
+
+            writer = threading.Thread(target=write, daemon=True)
+            writer.start()
+            blobs: list[bytes | None] = []
+            try:
+                for spec in specs:
+                    size = None if "\n" in spec else self._read_size(process)
+                    blobs.append(None if size is None else process.stdout.read(size + 1)[:-1])
+            except BaseException:
+                # The responses left in the pipe are out of step, and the writer
+                # may be stuck on a full stdin: kill the process (restarted on
+                # next use) so the write fails instead of blocking forever
+                process.kill()
+                process.wait()
+                raise
+            finally:
+                writer.join(timeout=TIMEOUT_FAST)
+            return blobs
+
+    def close(self) -> None:
+        with self._lock:
+            for process in self._processes.values():
+                process.stdin.close()
+                try:
+                    process.wait(timeout=TIMEOUT_FAST)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+                process.stdout.close()
+            self._processes.clear()
+
+    def __del__(self):
+        if self._processes:
+            self.close()
+
+
 class GitFilterRepoAdapter:
     """Adapter for git-filter-repo commands."""
 
-    def __init__(self, repo_path: str):
-        self.repo_path = Path(self._normalize_path(repo_path)).resolve()
+    # Repos already seen to have a .git, shared by every adapter in the process
+    _known_repos: ClassVar[set[Path]] = set()
+
+    def __init__(self, repo_path: str | os.PathLike[str]):
+        # Path objects are already native; only user-typed strings need normalizing
+        if isinstance(repo_path, str):
+            repo_path = self._normalize_path(repo_path)
+        self.repo_path = Path(repo_path).resolve()
         self._validate_repo()
         self._check_git_filter_repo()
+        self._cat_file = _CatFileBatch(self.repo_path)
+        self._commits_cache: OrderedDict[tuple[str, int | None, bool], tuple[CommitInfo, ...]] = (
+            OrderedDict()
+        )
+        self._file_cache: OrderedDict[tuple[str, str], str | None] = OrderedDict()
+
+    def close(self) -> None:
+        """Stop the background cat-file processes (restarted on demand)."""
+        self._cat_file.close()
+
+    def __enter__(self) -> "Self":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _invalidate_caches(self) -> None:
+        """Forget cached history after an operation that rewrites it."""
+        self._commits_cache.clear()
+        self._file_cache.clear()
+        self._cat_file.close()
 
     @staticmethod
     def _normalize_path(path: str) -> str:
         """Normalize path for cross-platform compatibility."""
-        if platform.system() != "Windows":
-            return path
+        if platform.system() != "Windows" or "/" not in path:
+            return path  # Every rewrite below swaps forward slashes
 
         # Git Bash style: /c/Users/... -> C:\Users\...
-        if match := re.match(r"^/([a-zA-Z])/(.*)$", path):
-            return f"{match.group(1).upper()}:\\{match.group(2).replace('/', '\\')}"
+        if match := _GITBASH_PATH_RE.match(path):
+            drive, rest = match.groups()
+            return drive.upper() + ":\\" + rest.replace("/", "\\")
 
         # WSL paths - keep as-is
         if path.startswith(("//wsl", "\\\\wsl")):
             return path
 
         # Unix absolute paths (not Git Bash) - keep as-is
-        if path.startswith("/") and not re.match(r"^/[a-zA-Z]/", path):
+        if path.startswith("/") and not _GITBASH_PREFIX_RE.match(path):
             return path
 
         # Windows paths with forward slashes
-        if re.match(r"^[a-zA-Z]:/", path):
+        if _DRIVE_PATH_RE.match(path):
             return path.replace("/", "\\")
 
         # Relative paths with forward slashes
-        if "/" in path and not path.startswith(("/", "\\\\")):
+        if not path.startswith(("/", "\\\\")):
             return path.replace("/", "\\")
 
         return path
 
     def _validate_repo(self) -> None:
         """Validate that the path is a git repository."""
+        if self.repo_path in self._known_repos:
+            return
         git_dir = self.repo_path / ".git"
         if not git_dir.exists():
             raise ValueError(f"Not a git repository: {self.repo_path}")
+        self._known_repos.add(self.repo_path)  # Only successes: a repo may be created later
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _which_git_filter_repo() -> str | None:
+        """PATH lookup for git-filter-repo, done once per process."""
+        return shutil.which("git-filter-repo")
 
     def _check_git_filter_repo(self) -> None:
         """Check if git-filter-repo is installed."""
-        if not shutil.which("git-filter-repo"):
+        if not self._which_git_filter_repo():
+            # Look again next time, in case it gets installed meanwhile
+            self._which_git_filter_repo.cache_clear()
             raise RuntimeError(
                 "git-filter-repo is not installed. Install with: pip install git-filter-repo"
             )
 
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _which_git() -> str:
+        """Absolute path of git, looked up once per process."""
+        return shutil.which("git") or "git"
+
+    def _git_argv(self, *args: str) -> list[str]:
+        """
+        Argv for a git command in this repo.
+
+        Targets the repo with -C rather than cwd and names git by absolute path,
+        which (with close_fds=False) lets CPython start it via posix_spawn
+        instead of fork + exec. --no-optional-locks keeps read-only queries from
+        taking index.lock.
+        """
+        return [self._which_git(), "--no-optional-locks", "-C", str(self.repo_path), *args]
+
     def _run_command(
-        self, args: list[str], check: bool = True, timeout: int = TIMEOUT_DEFAULT
+        self,
+        args: list[str],
+        check: bool = True,
+        timeout: int = TIMEOUT_DEFAULT,
+        text: bool = True,
+        input: str | bytes | None = None,
+        cwd: Path | None = None,
     ) -> subprocess.CompletedProcess:
-        """Run a command in the repo directory."""
+        """Run a command (in cwd, if given)."""
+        # Python's own fds are non-inheritable (PEP 446), so there is nothing to close
         try:
             return subprocess.run(
-                args, cwd=self.repo_path, capture_output=True, text=True, check=check, timeout=timeout
+                args,
+                cwd=cwd,
+                capture_output=True,
+                text=text,
+                check=check,
+                timeout=timeout,
+                input=input,
+                close_fds=False,
             )
         except subprocess.TimeoutExpired:
             logger.error(f"timeout {timeout}s: {args[0]}")
@@ -130,35 +629,177 @@ class GitFilterRepoAdapter:
 
     def _run_git(self, *args: str, timeout: int = TIMEOUT_DEFAULT) -> subprocess.CompletedProcess:
         """Run a git command."""
-        return self._run_command(["git", *args], timeout=timeout)
+        return self._run_command(self._git_argv(*args), timeout=timeout)
 
     def _run_git_fast(self, *args: str) -> subprocess.CompletedProcess:
         """Run a quick git command with short timeout."""
-        return self._run_command(["git", *args], timeout=TIMEOUT_FAST)
+        return self._run_command(self._git_argv(*args), timeout=TIMEOUT_FAST)
 
-    def _run_filter_repo(self, *args: str, dry_run: bool = False, force: bool = False) -> subprocess.CompletedProcess:
+    def _git_query(self, *args: str) -> bytes | None:
+        """Stdout of a small git query (rev-parse, counts), or None if git fails."""
+        # Bytes, no stderr pipe: skips the text decoder and the second pipe
+        try:
+            result = subprocess.run(
+                self._git_argv(*args),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                timeout=TIMEOUT_FAST,
+                check=False,
+                close_fds=False,
+            )
+        except subprocess.TimeoutExpired:
+            logger.error(f"timeout {TIMEOUT_FAST}s: git {args[0]}")
+            raise
+        return result.stdout if result.returncode == 0 else None
+
+    def _run_git_bytes(self, *args: str, input: bytes | None = None) -> subprocess.CompletedProcess:
+        """Run a git command with undecoded stdin/stdout, for bulk object listings."""
+        return self._run_command(self._git_argv(*args), text=False, input=input)
+
+    def _stream_git(self, *args: str, sep: str = "\n") -> Iterator[str]:
+        """Run a git command and yield stdout lines (or sep records) as they are produced."""
+        cmd = self._git_argv(*args)
+        # stderr goes to a file: a pipe only read once stdout ends would stall
+        # git as soon as it filled up
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(
+                cmd,
+                close_fds=False,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                text=True,
+                bufsize=1 << 20,
+            )
+            try:
+                if sep == "\n":
+                    for line in process.stdout:
+                        yield line.rstrip("\n")
+                else:
+                    yield from _split_stream(process.stdout, sep)
+                if process.wait() != 0:
+                    stderr_file.seek(0)
+                    stderr = stderr_file.read().decode(errors="replace")
+                    raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+            finally:
+                # Consumer stopped early (or git failed): don't leave git running
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+                process.stdout.close()
+
+    def _run_filter_repo(
+        self, *args: str, dry_run: bool = False, force: bool = False, input: str | None = None
+    ) -> subprocess.CompletedProcess:
         """Run git-filter-repo."""
+        # filter-repo already passes --no-data to fast-export when no blob
+        # callback or --replace-text is given, so metadata-only rewrites
+        # (messages, authors, dates) never stream blob contents
         cmd = ["git-filter-repo"]
         if dry_run:
             cmd.append("--dry-run")
         if force:
             cmd.append("--force")
         cmd.extend(args)
-        return self._run_command(cmd, check=False, timeout=TIMEOUT_LONG)
+        if not dry_run:
+            self._invalidate_caches()
+        return self._run_command(
+            cmd, check=False, timeout=TIMEOUT_LONG, input=input, cwd=self.repo_path
+        )
 
-    def get_commits(self, branch: str = "HEAD", max_count: int | None = None) -> list[CommitInfo]:
-        """Get commit information from the repository."""
-        args = ["log", "--format=%H|%an|%ae|%cn|%ce|%s|%aI", branch]
+    def get_commits(
+        self, branch: str = "HEAD", max_count: int | None = None, include_files: bool = False
+    ) -> list[CommitInfo]:
+        """
+        Get commit information from the repository.
+
+        With include_files, each CommitInfo.files is filled from the same git log.
+        Results are cached per resolved tip commit, so repeated calls on an
+        unchanged branch cost one rev-parse instead of a full git log. A
+        shorter listing of a cached tip is served as a prefix.
+        """
+        max_count = max_count or None  # 0 means no limit, as in git log
+        tip = self._resolve_commit(branch)
+        if tip is None:
+            # Ranges and bad refs: let git log handle (or report) them
+            return list(self.iter_commits(branch, max_count, include_files))
+
+        key = (tip, max_count, include_files)
+        commits = self._commits_cache.get(key)
+        if commits is not None:
+            self._commits_cache.move_to_end(key)
+            return list(commits)
+
+        commits = self._cached_prefix(tip, max_count, include_files)
+        if commits is None:
+            commits = tuple(self.iter_commits(tip, max_count, include_files))
+        self._commits_cache[key] = commits
+        if len(self._commits_cache) > COMMITS_CACHE_SIZE:
+            self._commits_cache.popitem(last=False)
+        return list(commits)
+
+    def _cached_prefix(
+        self, tip: str, max_count: int | None, include_files: bool
+    ) -> tuple[CommitInfo, ...] | None:
+        """The first max_count commits of tip from a longer cached listing, if any."""
+        for (cached_tip, cached_count, cached_files), commits in self._commits_cache.items():
+            if cached_tip != tip or cached_files != include_files:
+                continue
+            # A listing shorter than its limit already holds the whole history
+            complete = cached_count is None or len(commits) < cached_count
+            if complete or (max_count is not None and max_count <= cached_count):
+                return commits[:max_count]
+        return None
+
+    def _resolve_commit(self, rev: str) -> str | None:
+        """Full hash of the commit rev points at, or None if it isn't a single commit."""
+        output = self._git_query("rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}")
+        return None if output is None else output.strip().decode()
+
+    def iter_commits(
+        self, branch: str = "HEAD", max_count: int | None = None, include_files: bool = False
+    ) -> Iterator[CommitInfo]:
+        """Yield commits as git log produces them, without holding the whole history."""
+        for parts in self._iter_commit_fields(branch, max_count, include_files):
+            yield CommitInfo(*parts)
+
+    def get_commit_table(self, branch: str = "HEAD", max_count: int | None = None) -> CommitTable:
+        """Like get_commits, but packed into a CommitTable for long histories."""
+        table = CommitTable()
+        for parts in self._iter_commit_fields(branch, max_count):
+            table.add(*parts)
+        return table
+
+    def _iter_commit_fields(
+        self, branch: str, max_count: int | None, include_files: bool = False
+    ) -> Iterator[list]:
+        """Stream git log, split into the seven CommitInfo fields (plus files) per commit."""
+        # NUL-separated fields: "|" is legal in names and subjects, NUL is not
+        fields = "%H%x00%an%x00%ae%x00%cn%x00%ce%x00%s%x00%aI"
+        if include_files:
+            args = ["log", "-z", "--name-only", f"--format=%x01{fields}", branch]
+        else:
+            args = ["log", f"--format={fields}", branch]
         if max_count:
             args.append(f"-n{max_count}")
 
-        result = self._run_git(*args)
-        commits = []
-        for line in _parse_lines(result.stdout):
-            parts = line.split("|", 6)
+        intern = _IDENTITY_POOL.intern
+        if include_files:
+            records = _parse_commit_records(self._stream_git(*args, sep="\0"))
+        else:
+            records = (line.split("\0") for line in self._stream_git(*args))
+        for parts in records:
             if len(parts) >= 7:
-                commits.append(CommitInfo(*parts[:7]))
-        return commits
+                commit_hash, an, ae, cn, ce, message, date, *files = parts
+                yield [
+                    commit_hash,
+                    intern(an),
+                    intern(ae),
+                    intern(cn),
+                    intern(ce),
+                    message,
+                    date,
+                    *files,
+                ]
 
     def get_commit_diff(self, commit_hash: str) -> str:
         """Get diff for a commit."""
@@ -166,23 +807,39 @@ class GitFilterRepoAdapter:
 
     def get_commit_files(self, commit_hash: str) -> list[str]:
         """Get files changed in a commit."""
-        return _parse_lines(self._run_git_fast("show", "--name-only", "--format=", commit_hash).stdout)
+        # -z: paths come back verbatim instead of C-quoted when non-ASCII
+        output = self._run_git_fast("show", "-z", "--name-only", "--format=", commit_hash).stdout
+        return [path for path in output.split("\0") if path]
+
+    def get_many_commit_files(self, hashes: Iterable[str]) -> dict[str, list[str]]:
+        """Files changed per commit, for many full hashes with one git log per batch."""
+        files: dict[str, list[str]] = {commit_hash: [] for commit_hash in hashes}
+        pending = list(files)
+        for start in range(0, len(pending), COMMIT_BATCH_SIZE):
+            # --cc lists merge files the way `git show` does
+            records = self._stream_git(
+                "log",
+                "--no-walk=unsorted",
+                "--cc",
+                "-z",
+                "--name-only",
+                "--format=%x01%H",
+                *pending[start : start + COMMIT_BATCH_SIZE],
+                sep="\0",
+            )
+            for commit_hash, path in _parse_changed_files(records):
+                files.setdefault(commit_hash, []).append(path)
+        return files
 
     def analyze_history(self, branch: str = "HEAD", max_count: int = 100) -> dict:
         """Analyze repository history for potential rewrites."""
-        commits = self.get_commits(branch, max_count)
-
-        # Collect statistics
-        authors = {}
-        for commit in commits:
-            author_key = f"{commit.author_name} <{commit.author_email}>"
-            authors[author_key] = authors.get(author_key, 0) + 1
+        commits = self.get_commit_table(branch, max_count)
 
         # Skip file count for performance - can be slow on large repos
 
         return {
             "total_commits": len(commits),
-            "authors": authors,
+            "authors": commits.author_counts(),
             "commits": [
                 {
                     "hash": c.hash[:8],
@@ -190,7 +847,7 @@ class GitFilterRepoAdapter:
                     "message": c.message[:80],
                     "date": c.date,
                 }
-                for c in commits[:MAX_PREVIEW_COMMITS]
+                for c in commits.iter_slice(0, MAX_PREVIEW_COMMITS)
             ],
         }
 
@@ -227,48 +884,30 @@ class GitFilterRepoAdapter:
                 dry_run=True,
             )
 
-        # Create message-callback script with safe base64-encoded data
-        # This avoids exec() with user-controlled content
+        # filter-repo runs the callback body per commit; the replacement table is
+        # read once from stdin, so neither a temp script nor exec() of user data is needed
         replacements = {old: new for _, old, new in rewrites}
-        encoded_replacements = base64.b64encode(json.dumps(replacements).encode()).decode()
-
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
-            # Write self-contained script with embedded data
-            f.write(f'''import base64, json
-_DATA = "{encoded_replacements}"
-REPLACEMENTS = json.loads(base64.b64decode(_DATA).decode())
-
-def message_callback(message):
-    msg_str = message.decode('utf-8') if isinstance(message, bytes) else message
-    new_msg = REPLACEMENTS.get(msg_str.strip(), msg_str)
-    return new_msg.encode('utf-8') if isinstance(message, bytes) else new_msg
-''')
-            script_path = f.name
-
-        try:
-            # Use --message-callback with file: prefix (safer than exec)
-            result = self._run_filter_repo(
-                "--message-callback",
-                f"filename:{script_path}",
-                dry_run=False,
-                force=force,
-            )
-
-            if result.returncode != 0:
-                return FilterResult(
-                    success=False,
-                    message="Failed to rewrite commit messages",
-                    error=result.stderr,
-                )
+        result = self._run_filter_repo(
+            "--message-callback",
+            MESSAGE_CALLBACK_BODY,
+            dry_run=False,
+            force=force,
+            input=json.dumps(replacements, separators=(",", ":")),
+        )
 
+        if result.returncode != 0:
             return FilterResult(
-                success=True,
-                message=f"Successfully rewrote {len(rewrites)} commit messages",
-                commits_processed=len(commits),
-                commits_rewritten=len(rewrites),
+                success=False,
+                message="Failed to rewrite commit messages",
+                error=result.stderr,
             )
-        finally:
-            Path(script_path).unlink(missing_ok=True)
+
+        return FilterResult(
+            success=True,
+            message=f"Successfully rewrote {len(rewrites)} commit messages",
+            commits_processed=len(commits),
+            commits_rewritten=len(rewrites),
+        )
 
     def change_author(
         self,
@@ -279,21 +918,27 @@ def message_callback(message):
         force: bool = False,
     ) -> FilterResult:
         """Change author/committer information for commits."""
-        # Count affected commits
-        commits = self.get_commits()
-        affected = [c for c in commits if c.author_email == old_email]
+        # Count affected commits in git; "<email>" as a fixed string matches the email exactly
+        total = _safe_int(self._git_query("rev-list", "--count", "HEAD"))
+        affected = _safe_int(
+            self._git_query(
+                "rev-list", "--count", "--fixed-strings", f"--author=<{old_email}>", "HEAD"
+            )
+        )
 
         if dry_run:
             return FilterResult(
                 success=True,
-                message=f"Dry run: {len(affected)} commits would be updated",
-                commits_processed=len(commits),
-                commits_rewritten=len(affected),
+                message=f"Dry run: {affected} commits would be updated",
+                commits_processed=total,
+                commits_rewritten=affected,
                 dry_run=True,
             )
 
         # Create mailmap file
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".mailmap", delete=False) as f:
+        with tempfile.NamedTemporaryFile(
+            mode="w", encoding="utf-8", suffix=".mailmap", dir=_scratch_dir(), delete=False
+        ) as f:
             f.write(f"{new_name} <{new_email}> <{old_email}>\n")
             mailmap_path = f.name
 
@@ -309,9 +954,9 @@ def message_callback(message):
 
             return FilterResult(
                 success=True,
-                message=f"Successfully updated {len(affected)} commits",
-                commits_processed=len(commits),
-                commits_rewritten=len(affected),
+                message=f"Successfully updated {affected} commits",
+                commits_processed=total,
+                commits_rewritten=affected,
             )
         finally:
             Path(mailmap_path).unlink(missing_ok=True)
@@ -324,14 +969,12 @@ def message_callback(message):
     ) -> FilterResult:
         """Remove files from entire git history."""
         if dry_run:
-            try:
-                result = self._run_git("log", "--all", "--format=%H", "--", *paths)
-                affected = set(_parse_lines(result.stdout))
-            except Exception:
-                affected = set()
-                for path in paths:
-                    result = self._run_git("log", "--all", "--format=%H", "--", path)
-                    affected.update(_parse_lines(result.stdout))
+            # One history walk for all paths; git matches every pathspec per commit
+            affected = {
+                line
+                for line in self._stream_git("log", "--all", "--format=%H", "--", *paths)
+                if line
+            }
 
             return FilterResult(
                 success=True, message=f"Dry run: {len(affected)} commits affected",
@@ -350,42 +993,22 @@ def message_callback(message):
         self, size_threshold_mb: float = 10.0, dry_run: bool = True, force: bool = False,
     ) -> FilterResult:
         """Remove files larger than threshold from history."""
-        result = self._run_git("rev-list", "--objects", "--all")
         size_bytes = int(size_threshold_mb * 1024 * 1024)
 
-        # Parse objects with paths
-        objects_with_paths = {}
-        object_hashes = []
-        for line in _parse_lines(result.stdout):
-            parts = line.split(" ", 1)
-            if len(parts) == 2:
-                objects_with_paths[parts[0]] = parts[1]
-                object_hashes.append(parts[0])
-
-        if not object_hashes:
-            return FilterResult(success=True, message="No files found", files_affected=[], dry_run=dry_run)
-
-        # Batch size check
-        large_files = []
         try:
-            batch_result = subprocess.run(
-                ["git", "cat-file", "--batch-check=%(objectsize)"],
-                cwd=self.repo_path, input="\n".join(object_hashes),
-                capture_output=True, text=True, timeout=TIMEOUT_DEFAULT,
-            )
-            for blob_hash, size_str in zip(object_hashes, _parse_lines(batch_result.stdout)):
-                size = _safe_int(size_str)
-                if size > size_bytes:
-                    large_files.append((objects_with_paths.get(blob_hash, blob_hash), size / (1024 * 1024)))
-        except Exception as e:
-            logger.warning(f"batch failed: {e}")
-            for blob_hash in object_hashes[:100]:
-                try:
-                    size = _safe_int(self._run_git_fast("cat-file", "-s", blob_hash).stdout)
+            sized_paths = self._large_blob_paths(size_bytes)
+        except (subprocess.CalledProcessError, OSError) as e:
+            logger.warning(f"cat-file --batch-all-objects failed, walking history instead: {e}")
+            sized_paths = []
+            for line in self._run_git_bytes("rev-list", "--objects", "--all").stdout.split(b"\n"):
+                object_hash, _, path = line.partition(b" ")
+                if path:
+                    size = self._cat_file.get_size(object_hash.decode()) or 0
                     if size > size_bytes:
-                        large_files.append((objects_with_paths.get(blob_hash, blob_hash), size / (1024 * 1024)))
-                except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
-                    continue
+                        sized_paths.append((size, path))
+
+        # Only the paths of oversized blobs are decoded
+        large_files = [(os.fsdecode(path), size / (1024 * 1024)) for size, path in sized_paths]
 
         if dry_run:
             return FilterResult(
@@ -405,6 +1028,34 @@ def message_callback(message):
         paths = [p for p, _ in large_files]
         return self.remove_files(paths, dry_run=False, force=force)
 
+    def _large_blob_paths(self, size_bytes: int) -> list[tuple[int, bytes]]:
+        """(size, path) for every blob over size_bytes reachable from any ref."""
+        # Headers straight from the object store, in pack order: no history walk, and
+        # no commits or trees sent through cat-file one by one
+        listing = self._run_git_bytes(
+            "cat-file",
+            "--batch-all-objects",
+            "--unordered",
+            "--batch-check=%(objecttype) %(objectsize) %(objectname)",
+        )
+        large: dict[bytes, int] = {}
+        for line in listing.stdout.split(b"\n"):
+            if line.startswith(b"blob "):
+                size, _, oid = line[5:].partition(b" ")
+                if int(size) > size_bytes:
+                    large[oid] = int(size)
+        if not large:
+            return []
+
+        # Only now walk history, for the paths of the few oversized blobs; anything
+        # unreachable (dangling objects) never shows up here and is dropped
+        sized_paths = []
+        for line in self._run_git_bytes("rev-list", "--objects", "--all").stdout.split(b"\n"):
+            oid, _, path = line.partition(b" ")
+            if path and oid in large:
+                sized_paths.append((large[oid], path))
+        return sized_paths
+
     def filter_paths(
         self,
         include_paths: list[str] | None = None,
@@ -462,6 +1113,7 @@ def message_callback(message):
             current_branch = result.stdout.strip()
 
             # Reset to backup
+            self._invalidate_caches()
             self._run_git("reset", "--hard", backup_branch)
             self._run_git("branch", "-D", backup_branch)
 
@@ -482,60 +1134,39 @@ def message_callback(message):
         max_commits: int = 100,
     ) -> dict:
         """Scan repository history for potential secrets."""
-        from .secrets import get_file_risk_level, is_sensitive_file, scan_content
+        from .secrets import get_file_risk_level, is_sensitive_file
 
-        commits = self.get_commits(branch, max_commits)
+        # One git log for metadata and changed files alike
+        commits = self.get_commits(branch, max_commits, include_files=True)
         findings = []
         sensitive_files = []
+        changed = [(commit.hash, file_path) for commit in commits for file_path in commit.files]
+
+        for commit_hash, file_path in changed:
+            if is_sensitive_file(file_path):
+                sensitive_files.append(
+                    {
+                        "file": file_path,
+                        "commit": commit_hash[:8],
+                        "risk": get_file_risk_level(file_path),
+                    }
+                )
+        files_to_scan = changed[:MAX_FILES_TO_SCAN]
 
-        # Get all files for all commits in a single git command (optimized)
-        try:
-            result = self._run_git(
-                "log",
-                "--name-only",
-                "--format=%H",
-                f"-n{max_commits}",
-                branch,
-            )
-
-            # Parse: commit hash followed by files
-            commit_files_map = {}
-            current_hash = None
-            for line in _parse_lines(result.stdout):
-                if len(line) == 40 and line.isalnum():
-                    current_hash = line
-                    commit_files_map[current_hash] = []
-                elif current_hash:
-                    commit_files_map[current_hash].append(line)
-        except Exception:
-            commit_files_map = {c.hash: self.get_commit_files(c.hash) for c in commits[:20]}
-
-        # Collect files to scan
-        files_to_scan = []
-        for commit in commits:
-            for file_path in commit_files_map.get(commit.hash, []):
-                if is_sensitive_file(file_path):
-                    sensitive_files.append({
-                        "file": file_path, "commit": commit.hash[:8], "risk": get_file_risk_level(file_path),
-                    })
-                if len(files_to_scan) < MAX_FILES_TO_SCAN:
-                    files_to_scan.append((commit.hash, file_path))
-
-        # Scan contents
-        for commit_hash, file_path in files_to_scan:
+        # Read contents through the cat-file pipe in one pipelined batch, then scan
+        contents = self._cat_file.get_blobs(
+            [f"{commit_hash}:{file_path}" for commit_hash, file_path in files_to_scan]
+        )
+        blobs = [
+            (commit_hash, file_path, data)
+            for (commit_hash, file_path), data in zip(files_to_scan, contents)
+            if data  # None if deleted in this commit
+        ]
+
+        for file_findings in self._scan_blobs(blobs):
+            findings.extend(file_findings)
             if len(findings) >= MAX_FINDINGS_LIMIT:
                 break
-            try:
-                content = self._run_git_fast("show", f"{commit_hash}:{file_path}").stdout
-                if not content:
-                    continue
-                for f in scan_content(content, file_path, commit_hash):
-                    findings.append({
-                        "type": f.pattern_name, "description": f.description, "severity": f.severity,
-                        "file": f.file_path, "commit": f.commit_hash[:8], "line": f.line_number, "matched": f.matched_text,
-                    })
-            except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
-                continue
 
         return {
             "commits_scanned": len(commits), "secrets_found": len(findings),
@@ -543,18 +1174,53 @@ def message_callback(message):
             "sensitive_file_list": sensitive_files[:MAX_PREVIEW_COMMITS], "files_scanned": len(files_to_scan),
         }
 
+    @staticmethod
+    def _scan_blobs(blobs: list[tuple[str, str, bytes]]) -> Iterator[list[dict]]:
+        """Yield findings per blob, in order; large batches are scanned on all cores."""
+        workers = min(os.cpu_count() or 1, len(blobs))
+        if workers < 2 or sum(len(data) for _, _, data in blobs) < PARALLEL_SCAN_MIN_BYTES:
+            yield from map(_scan_blob, blobs)
+            return
+
+        # The server runs threads (cat-file writers, the AI callback loop), and
+        # forking a threaded process can copy a held lock into the child
+        start_method = "forkserver"
+        if start_method not in multiprocessing.get_all_start_methods():
+            start_method = "spawn"  # Windows
+        context = multiprocessing.get_context(start_method)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            try:
+                yield from executor.map(
+                    _scan_blob, blobs, chunksize=max(1, len(blobs) // (workers * 4))
+                )
+            finally:
+                # Caller hit the findings limit: drop the queued blobs
+                executor.shutdown(cancel_futures=True)
+
     def get_file_at_commit(self, commit_hash: str, file_path: str) -> str | None:
         """Get file content at a specific commit."""
-        try:
-            return self._run_git_fast("show", f"{commit_hash}:{file_path}").stdout
-        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
-            return None
+        # Only a full hash names immutable content; refs like HEAD can move
+        key = (commit_hash, file_path)
+        cacheable = _FULL_HASH_RE.fullmatch(commit_hash) is not None
+        if cacheable and key in self._file_cache:
+            self._file_cache.move_to_end(key)
+            return self._file_cache[key]
+
+        data = self._cat_file.get_blob(f"{commit_hash}:{file_path}")
+        content = None if data is None else data.decode("utf-8", errors="replace")
+        if cacheable:
+            self._file_cache[key] = content
+            if len(self._file_cache) > FILE_CACHE_SIZE:
+                self._file_cache.popitem(last=False)
+        return content
 
     def list_all_files_in_history(self, limit: int = MAX_FILES_LIMIT) -> list[str]:
         """List all files that have ever existed."""
         files = set()
-        for line in _parse_lines(self._run_git("log", "--all", "--name-only", "--format=").stdout):
-            files.add(line)
+        for path in self._stream_git("log", "--all", "-z", "--name-only", "--format=", sep="\0"):
+            if not path:
+                continue
+            files.add(path)
             if len(files) >= limit:
                 break
         return sorted(files)[:limit]
@@ -562,15 +1228,19 @@ def message_callback(message):
     def get_file_history(self, file_path: str) -> list[dict]:
         """Get commit history for a specific file."""
         history = []
-        for line in _parse_lines(self._run_git("log", "--follow", "--format=%H|%an|%ae|%s|%aI", "--", file_path).stdout):
-            parts = line.split("|", 4)
-            if len(parts) >= 5:
+        for line in self._stream_git(
+            "log", "--follow", "--format=%H%x00%an%x00%ae%x00%s%x00%aI", "--", file_path
+        ):
+            parts = line.split("\0")
+            if len(parts) == 5:
                 history.append({"hash": parts[0][:8], "author": f"{parts[1]} <{parts[2]}>", "message": parts[3], "date": parts[4]})
         return history
 
     def squash_commits(self, start_commit: str, end_commit: str = "HEAD", new_message: str | None = None, dry_run: bool = True) -> FilterResult:
         """Squash a range of commits into one."""
-        commit_count = _safe_int(self._run_git("rev-list", "--count", f"{start_commit}..{end_commit}").stdout)
+        commit_count = _safe_int(
+            self._git_query("rev-list", "--count", f"{start_commit}..{end_commit}")
+        )
         if commit_count == 0:
             return FilterResult(success=False, message=f"Invalid commit range: {start_commit}..{end_commit}")
 
@@ -582,6 +1252,7 @@ def message_callback(message):
                 messages = _parse_lines(self._run_git("log", "--format=%s", f"{start_commit}..{end_commit}").stdout)
                 new_message = "Squashed commits:\n" + "\n".join(f"- {m}" for m in messages) if messages else "Squashed commits"
 
+            self._invalidate_caches()
             self._run_git("reset", "--soft", start_commit)
             self._run_git("commit", "-m", new_message)
             return FilterResult(success=True, message=f"Squashed {commit_count} commits", commits_processed=commit_count, commits_rewritten=1)
@@ -589,23 +1260,56 @@ def message_callback(message):
             return FilterResult(success=False, message="Failed to squash", error=str(e))
 
     def replace_text_in_history(
-        self, old_text: str, new_text: str, file_pattern: str | None = None, dry_run: bool = True, force: bool = False,
+        self,
+        old_text: str,
+        new_text: str,
+        file_pattern: str | None = None,
+        dry_run: bool = True,
+        force: bool = False,
+        regex: bool = False,
     ) -> FilterResult:
-        """Replace text throughout repository history."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
-            f.write(f"regex:{re.escape(old_text)}==>{new_text}\n")
-            expressions_path = f.name
+        """
+        Replace text throughout repository history.
+
+        old_text is matched literally unless regex is True, in which case it is a
+        Python regular expression.
+        """
+        # One "<match>==>replacement" line; filter-repo splits on the last "==>"
+        if "\n" in old_text or "\n" in new_text or "==>" in new_text:
+            raise ValueError(
+                "old_text and new_text must be single lines, and new_text cannot contain '==>'"
+            )
 
         if dry_run:
-            grep_args = ["grep", "-r", "-l", old_text, "."]
+            # Pickaxe search over all refs: every path whose history adds or removes the
+            # text, which is what --replace-text will rewrite (not just the working tree)
+            log_args = ["log", "--all", "-z", "--name-only", "--format=", f"-S{old_text}"]
+            if regex:
+                log_args.append("--pickaxe-regex")  # POSIX ERE, close enough for a preview
             if file_pattern:
-                grep_args.extend(["--include", file_pattern])
+                log_args.extend(["--", file_pattern])
             try:
-                files_with_matches = _parse_lines(self._run_command(grep_args, check=False).stdout)
-            except Exception:
-                files_with_matches = []
-            Path(expressions_path).unlink(missing_ok=True)
-            return FilterResult(success=True, message=f"Dry run: {len(files_with_matches)} files", files_affected=files_with_matches[:20], dry_run=True)
+                files_with_matches = list(
+                    dict.fromkeys(p for p in self._stream_git(*log_args, sep="\0") if p)
+                )
+            except subprocess.CalledProcessError as e:
+                return FilterResult(
+                    success=False, message="Failed to search history", error=e.stderr, dry_run=True
+                )
+            return FilterResult(
+                success=True,
+                message=f"Dry run: {len(files_with_matches)} files",
+                files_affected=files_with_matches[:20],
+                dry_run=True,
+            )
+
+        # literal: is a plain substring replace inside filter-repo, no regex engine
+        prefix = "regex:" if regex else "literal:"
+        with tempfile.NamedTemporaryFile(
+            mode="w", encoding="utf-8", suffix=".txt", dir=_scratch_dir(), delete=False
+        ) as f:
+            f.write(f"{prefix}{old_text}==>{new_text}\n")
+            expressions_path = f.name
 
         try:
             args = ["--replace-text", expressions_path]
@@ -682,18 +1386,17 @@ def message_callback(message):
         # Generate new dates
         date_mappings = {}  # commit_hash -> new_timestamp
 
-        # Parse original dates and sort by date (oldest first)
+        # Parse original dates to unix seconds and sort by date (oldest first)
         commit_dates = []
         for commit in commits:
             try:
-                orig_dt = datetime.datetime.fromisoformat(commit.date.replace("Z", "+00:00"))
-                commit_dates.append((commit.hash, orig_dt))
+                commit_dates.append((commit.hash, *_parse_git_date(commit.date)))
             except ValueError:
                 continue
 
-        commit_dates.sort(key=lambda x: x[1])  # Sort by date, oldest first
+        commit_dates.sort(key=lambda x: x[1])
 
-        # Determine base date
+        # Determine base date as wall-clock seconds plus its UTC offset
         if start_date:
             try:
                 base_date = datetime.datetime.strptime(start_date, "%Y-%m-%d")
@@ -703,66 +1406,50 @@ def message_callback(message):
                     message=f"Invalid start_date format: {start_date}",
                     error="Use YYYY-MM-DD format",
                 )
+            utc_offset = int(base_date.astimezone().utcoffset().total_seconds())
+            base_wall = calendar.timegm(base_date.timetuple())
+        elif commit_dates:
+            _, base_ts, utc_offset = commit_dates[0]
+            base_wall = base_ts + utc_offset
         else:
-            base_date = commit_dates[0][1] if commit_dates else datetime.datetime.now()
-
-        # Generate new timestamps
-        current_date = base_date
-        prev_timestamp = None
-
-        for commit_hash, orig_dt in commit_dates:
-            # Find next valid datetime
-            for _ in range(100):  # Max attempts to find valid date
-                # Generate random time within range
-                if end_hour >= start_hour:
-                    hour = random.randint(start_hour, end_hour)
-                    if hour == end_hour:
-                        minute = random.randint(0, end_min)
-                    elif hour == start_hour:
-                        minute = random.randint(start_min, 59)
-                    else:
-                        minute = random.randint(0, 59)
-                else:
-                    # Crosses midnight (e.g., 22:00-02:00)
-                    if random.random() < 0.5:
-                        hour = random.randint(start_hour, 23)
-                    else:
-                        hour = random.randint(0, end_hour)
-                    minute = random.randint(0, 59)
-
-                second = random.randint(0, 59)
-
-                new_dt = current_date.replace(hour=hour, minute=minute, second=second, microsecond=0)
-
-                # Check weekend constraint
-                if weekend_only and new_dt.weekday() < 5:  # 0-4 are weekdays
-                    # Move to next weekend
-                    days_until_saturday = (5 - new_dt.weekday()) % 7
-                    if days_until_saturday == 0:
-                        days_until_saturday = 7
-                    current_date = current_date + datetime.timedelta(days=days_until_saturday)
-                    continue
-
-                # Ensure ordering
-                if preserve_order and prev_timestamp:
-                    if new_dt <= prev_timestamp:
-                        # Add some time
-                        new_dt = prev_timestamp + datetime.timedelta(minutes=random.randint(5, 60))
-                        current_date = new_dt
+            base_wall = utc_offset = 0
 
-                break
+        # Generate new timestamps: one random second-of-day per commit, in integer
+        # wall-clock seconds (the base date's UTC offset held fixed)
+        if end_hour >= start_hour:
+            windows = [(start_hour * 3600 + start_min * 60, end_hour * 3600 + end_min * 60 + 59)]
+        else:
+            # Crosses midnight (e.g., 22:00-02:00): late evening or early morning, same date
+            windows = [(start_hour * 3600, 86399), (0, end_hour * 3600 + 3599)]
 
-            date_mappings[commit_hash] = int(new_dt.timestamp())
-            prev_timestamp = new_dt
+        day = base_wall - base_wall % 86400
+        prev_wall = None
+
+        for commit_hash, _orig_ts, _orig_offset in commit_dates:
+            weekday = (day // 86400 + 3) % 7  # 1970-01-01 was a Thursday; Monday is 0
+            if weekend_only and weekday < 5:
+                day += (5 - weekday) * 86400
+
+            low, high = random.choice(windows)
+            new_wall = day + random.randint(low, high)
+
+            # Ensure ordering
+            if preserve_order and prev_wall is not None and new_wall <= prev_wall:
+                new_wall = prev_wall + random.randint(5, 60) * 60
+                day = new_wall - new_wall % 86400
+
+            date_mappings[commit_hash] = new_wall - utc_offset
+            prev_wall = new_wall
 
             # Occasionally move to next day for variety
             if random.random() < 0.3:
-                current_date = current_date + datetime.timedelta(days=1)
+                day += 86400
 
         if dry_run:
             preview = []
+            by_hash = {c.hash: c for c in commits}
             for commit_hash, new_ts in list(date_mappings.items())[:10]:
-                orig_commit = next((c for c in commits if c.hash == commit_hash), None)
+                orig_commit = by_hash.get(commit_hash)
                 if orig_commit:
                     new_dt = datetime.datetime.fromtimestamp(new_ts)
                     preview.append(
@@ -777,44 +1464,24 @@ def message_callback(message):
                 dry_run=True,
             )
 
-        # Create commit callback script
-        encoded_mappings = base64.b64encode(json.dumps(date_mappings).encode()).decode()
-
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
-            f.write(f'''import base64, json
-_DATA = "{encoded_mappings}"
-DATE_MAP = json.loads(base64.b64decode(_DATA).decode())
-
-def commit_callback(commit):
-    commit_hash = commit.original_id.decode() if commit.original_id else None
-    if commit_hash and commit_hash in DATE_MAP:
-        new_ts = DATE_MAP[commit_hash]
-        new_date = f"{{new_ts}} +0000".encode()
-        commit.author_date = new_date
-        commit.committer_date = new_date
-''')
-            script_path = f.name
-
-        try:
-            result = self._run_filter_repo(
-                "--commit-callback",
-                f"filename:{script_path}",
-                dry_run=False,
-                force=force,
-            )
-
-            if result.returncode != 0:
-                return FilterResult(
-                    success=False,
-                    message="Failed to change commit dates",
-                    error=result.stderr,
-                )
+        result = self._run_filter_repo(
+            "--commit-callback",
+            COMMIT_DATE_CALLBACK_BODY,
+            dry_run=False,
+            force=force,
+            input=json.dumps(date_mappings, separators=(",", ":")),
+        )
 
+        if result.returncode != 0:
             return FilterResult(
-                success=True,
-                message=f"Successfully changed dates for {len(date_mappings)} commits",
-                commits_processed=len(commits),
-                commits_rewritten=len(date_mappings),
+                success=False,
+                message="Failed to change commit dates",
+                error=result.stderr,
             )
-        finally:
-            Path(script_path).unlink(missing_ok=True)
+
+        return FilterResult(
+            success=True,
+            message=f"Successfully changed dates for {len(date_mappings)} commits",
+            commits_processed=len(commits),
+            commits_rewritten=len(date_mappings),
+        )
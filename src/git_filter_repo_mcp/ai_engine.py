@@ -1,15 +1,101 @@
 """AI-powered commit message engine using Ollama, OpenAI, or Anthropic."""
 
 import asyncio
+import hashlib
+import importlib.util
+import json
 import logging
-from dataclasses import dataclass
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable, Iterable
+from dataclasses import dataclass, replace
 from enum import Enum
-from typing import Callable, Protocol
+from typing import Protocol
 
 import httpx
 
+try:
+    import orjson
+except ImportError:  # Optional speedup, see the "fast" extra
+    orjson = None
+
+# HTTP/2 multiplexes concurrent requests over one TLS connection; httpx needs h2
+# for it (httpx[http2], see the "fast" extra)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 logger = logging.getLogger(__name__)
 
+# Conventional commit types accepted as-is by OllamaProvider._parse_response
+_CONVENTIONAL_PREFIX_RE = re.compile(
+    r"(?:feat|fix|docs|style|refactor|test|chore|perf|ci|build|revert):", re.IGNORECASE
+)
+
+DEFAULT_MAX_CONNECTIONS = 100
+
+# Commits packed into one request by providers with generate_messages_batch
+PROMPT_BATCH_SIZE = 16
+
+# Prompt budget for per-commit details
+PROMPT_MAX_FILES = 10
+DIFF_SUMMARY_MAX_BYTES = 500
+SHARED_CLIENT_TIMEOUT = 120.0
+
+# One pooled client per event loop and pool size: httpx connections are bound to
+# the loop that opened them, and create_callback() runs its own loop
+_shared_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[int, httpx.AsyncClient]
+] = weakref.WeakKeyDictionary()
+
+
+def _pool_limits(max_connections: int | None) -> httpx.Limits:
+    """Connection pool limits; idle connections are kept long enough to reuse across commits."""
+    max_connections = max_connections or DEFAULT_MAX_CONNECTIONS
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max(1, max_connections // 2),
+        keepalive_expiry=30.0,
+    )
+
+
+def _encode_json(payload: dict) -> bytes:
+    """Serialize a request body (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _decode_json(data: bytes | str):
+    """Parse a response body (orjson when installed)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def get_shared_client(max_connections: int | None = None) -> httpx.AsyncClient:
+    """Connection-pooled client shared by all providers on the running loop."""
+    max_connections = max_connections or DEFAULT_MAX_CONNECTIONS
+    clients = _shared_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(max_connections)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=SHARED_CLIENT_TIMEOUT,
+            limits=_pool_limits(max_connections),
+            http2=HTTP2_AVAILABLE,
+        )
+        clients[max_connections] = client
+    return client
+
+
+async def close_shared_clients() -> None:
+    """Close the shared clients of the running loop."""
+    for client in _shared_clients.pop(asyncio.get_running_loop(), {}).values():
+        await client.aclose()
+
 
 class AIConnectionError(Exception):
     """AI connection failed."""
@@ -20,6 +106,10 @@ class AIConnectionError(Exception):
         super().__init__(f"{provider}: {message}")
 
 
+class FallbackMessage(str):
+    """Original message returned by a provider with raise_on_error=False that failed."""
+
+
 class MessageStyle(str, Enum):
     """Commit message style."""
 
@@ -29,7 +119,7 @@ class MessageStyle(str, Enum):
     DETAILED = "detailed"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CommitContext:
     """Commit context."""
 
@@ -40,7 +130,7 @@ class CommitContext:
     author: str | None = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RewriteResult:
     """Rewrite result."""
 
@@ -48,6 +138,118 @@ class RewriteResult:
     rewritten: str
     commit_hash: str
     reasoning: str | None = None
+    from_cache: bool = False
+    error: str | None = None  # Set when the rewrite failed; rewritten is the original
+
+
+class RewriteCache:
+    """
+    In-memory LRU cache of rewrite results with per-entry TTL.
+
+    Keys are content hashes of the prompt inputs (see make_key), so identical
+    commits on a second pass over a repo skip the provider entirely. With a
+    path, entries are also kept in a SQLite file so later runs reuse them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 3600.0,
+        path: str | os.PathLike[str] | None = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, RewriteResult]] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        if path is not None:
+            path = os.path.expanduser(path)
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS rewrites (key TEXT PRIMARY KEY, expires_at REAL, "
+                "original TEXT, rewritten TEXT, reasoning TEXT)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(context: CommitContext, style: MessageStyle, model: str = "") -> str:
+        """Hash the inputs that shape the prompt; commit hash and author are excluded."""
+        parts = (
+            style.value,
+            model,
+            context.original_message.strip(),
+            "\n".join(sorted(context.files_changed)),
+            (context.diff_summary or "").strip(),
+        )
+        return hashlib.blake2b("\0".join(parts).encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> RewriteResult | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return self._load(key)
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: RewriteResult, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self._remember(key, value, ttl)
+        if self._db is not None:
+            # Wall-clock expiry on disk: monotonic time doesn't carry across runs
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO rewrites VALUES (?, ?, ?, ?, ?)",
+                    (key, time.time() + ttl, value.original, value.rewritten, value.reasoning),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, value: RewriteResult, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> RewriteResult | None:
+        """Entry from the SQLite file, promoted to memory; None without one."""
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT expires_at, original, rewritten, reasoning FROM rewrites WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        expires_at, original, rewritten, reasoning = row
+        remaining = expires_at - time.time()
+        if remaining <= 0:
+            return None
+        # The engine swaps in the commit hash of the request
+        value = RewriteResult(
+            original=original, rewritten=rewritten, commit_hash="", reasoning=reasoning
+        )
+        self._remember(key, value, remaining)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM rewrites")
+                self._db.commit()
+
+    def close(self) -> None:
+        """Close the SQLite file, if any (the in-memory entries stay usable)."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
 
 
 class AIProvider(Protocol):
@@ -101,27 +303,144 @@ This allows secure access control for user resources."
 }
 
 
-def build_prompt(context: CommitContext, style: MessageStyle) -> str:
-    """Build prompt."""
+# Per-style instructions, built once. They don't depend on the commit, so they form
+# a prefix that is byte-identical across commits and can be served from provider
+# prompt caches
+PROMPT_INSTRUCTIONS = {
+    style: f"""You are a git commit message writer. Rewrite the given commit message to be clearer and more descriptive.
+
+{STYLE_INSTRUCTIONS[style]}
+
+Respond with ONLY the new commit message, nothing else. Do not include quotes around the message."""
+    for style in MessageStyle
+}
+
+
+def _truncate_utf8(text: str, limit: int) -> str:
+    """Cut text to at most limit UTF-8 bytes without splitting a character."""
+    # Each character is at least one byte, so only the first limit characters can fit
+    head = text[:limit].encode()
+    if len(head) <= limit:
+        return text[:limit]
+    return head[:limit].decode(errors="ignore")
+
+
+def build_prompt_parts(context: CommitContext, style: MessageStyle) -> tuple[str, str]:
+    """Build the prompt as (instructions, commit details)."""
+    instructions = PROMPT_INSTRUCTIONS[style]
+
     files_info = ""
     if context.files_changed:
-        files_info = f"\nFiles changed: {', '.join(context.files_changed[:10])}"
-        if len(context.files_changed) > 10:
-            files_info += f" (+{len(context.files_changed) - 10} more)"
+        files = context.files_changed
+        files_info = f"\nFiles changed: {', '.join(files[:PROMPT_MAX_FILES])}"
+        if len(files) > PROMPT_MAX_FILES:
+            files_info += f" (+{len(files) - PROMPT_MAX_FILES} more)"
 
     diff_info = ""
     if context.diff_summary:
-        diff_info = f"\nDiff summary:\n{context.diff_summary[:500]}"
+        diff_info = (
+            f"\nDiff summary:\n{_truncate_utf8(context.diff_summary, DIFF_SUMMARY_MAX_BYTES)}"
+        )
+
+    details = f"""Original commit message: "{context.original_message}"
+{files_info}
+{diff_info}"""
+    return instructions, details
+
+
+def build_prompt(context: CommitContext, style: MessageStyle) -> str:
+    """Build prompt as a single string, instructions first."""
+    return "\n\n".join(build_prompt_parts(context, style))
+
 
-    return f"""You are a git commit message writer. Rewrite the following commit message to be clearer and more descriptive.
+BATCH_PROMPT_INSTRUCTIONS = {
+    style: f"""You are a git commit message writer. Rewrite each of the numbered commit messages below to be clearer and more descriptive.
 
 {STYLE_INSTRUCTIONS[style]}
 
-Original commit message: "{context.original_message}"
-{files_info}
-{diff_info}
+Respond with ONLY a JSON object of the form {{"messages": ["...", "..."]}}, holding one new commit message per numbered commit, in the same order."""
+    for style in MessageStyle
+}
 
-Respond with ONLY the new commit message, nothing else. Do not include quotes around the message."""
+
+def build_batch_prompt_parts(contexts: list[CommitContext], style: MessageStyle) -> tuple[str, str]:
+    """Build one prompt for several commits as (instructions, numbered commit details)."""
+    details = "\n\n".join(
+        f"[{number}]\n{build_prompt_parts(context, style)[1].strip()}"
+        for number, context in enumerate(contexts, 1)
+    )
+    return BATCH_PROMPT_INSTRUCTIONS[style], details
+
+
+def _parse_batch_reply(text: str, count: int) -> list[str]:
+    """Messages from a batch reply; ValueError unless it holds exactly count strings."""
+    # Tolerate prose or code fences around the object
+    start, end = text.find("{"), text.rfind("}")
+    data = _decode_json(text[start : end + 1].encode()) if start >= 0 else None
+    messages = data.get("messages") if isinstance(data, dict) else None
+    if (
+        not isinstance(messages, list)
+        or len(messages) != count
+        or not all(isinstance(m, str) for m in messages)
+    ):
+        raise ValueError(f"expected {count} messages")
+    return [message.strip().strip("\"'") for message in messages]
+
+
+def _is_outage(error: Exception) -> bool:
+    """Whether an HTTP error means the provider is down or throttling, not a bad request."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """
+    Fail fast while a provider is down.
+
+    Opens after failure_threshold consecutive outages (connection errors,
+    timeouts, 429 and 5xx responses). While open, requests are refused for
+    cooldown seconds; then one request is let through as a probe, and its
+    outcome closes the circuit or keeps it open for another cooldown.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failure_count = 0
+        self.opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now < self.opened_at + self.cooldown:
+            return False
+        # Half-open: this request probes, the rest wait out another cooldown
+        self.opened_at = now
+        return True
+
+    def record_success(self) -> None:
+        self.failure_count = 0
+        self.opened_at = None
+
+    def record_failure(self, error: Exception) -> None:
+        if not _is_outage(error):
+            # The provider answered, it just rejected this request
+            self.record_success()
+            return
+        self.failure_count += 1
+        if self.opened_at is not None or self.failure_count >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+CIRCUIT_OPEN_MESSAGE = "Provider unavailable after repeated failures; retrying after cooldown"
 
 
 class OllamaProvider:
@@ -132,19 +451,42 @@ class OllamaProvider:
         base_url: str = "http://localhost:11434",
         model: str = "llama3.2",
         raise_on_error: bool = True,
+        shared_client: bool = False,
+        max_connections: int | None = None,
+        model_tiers: dict[MessageStyle | str, str] | None = None,
     ):
         self.base_url = base_url
         self.model = model
         self.raise_on_error = raise_on_error
-        self.client = httpx.AsyncClient(timeout=60.0)
+        self.timeout = 60.0
+        self.headers = {"content-type": "application/json"}
+        self.max_connections = max_connections
+        # Per-style model overrides, e.g. a small model for one-line styles
+        self.model_tiers = {MessageStyle(k): v for k, v in (model_tiers or {}).items()}
+        self.breaker = CircuitBreaker()
+        self._client = (
+            None
+            if shared_client
+            else httpx.AsyncClient(timeout=self.timeout, limits=_pool_limits(max_connections))
+        )
         self._last_error: str | None = None
 
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client if self._client is not None else get_shared_client(self.max_connections)
+
+    def model_for(self, style: MessageStyle) -> str:
+        """Model used for style: its tier if configured, else the default model."""
+        return self.model_tiers.get(style, self.model)
+
     async def check_connection(self) -> tuple[bool, str]:
         """Check connection."""
         try:
-            response = await self.client.get(f"{self.base_url}/api/tags", timeout=5.0)
+            response = await self.client.get(
+                f"{self.base_url}/api/tags", headers=self.headers, timeout=5.0
+            )
             response.raise_for_status()
-            models = response.json().get("models", [])
+            models = _decode_json(response.content).get("models", [])
             model_names = [m.get("name", "").split(":")[0] for m in models]
             if self.model.split(":")[0] not in model_names:
                 return False, f"Model '{self.model}' not found. Available: {model_names}"
@@ -156,86 +498,140 @@ class OllamaProvider:
 
     async def generate_message(self, context: CommitContext, style: MessageStyle) -> str:
         """Generate message."""
-        prompt = build_prompt(context, style)
+        instructions, details = build_prompt_parts(context, style)
         self._last_error = None
+        if not self.breaker.allow():
+            self._last_error = CIRCUIT_OPEN_MESSAGE
+            if self.raise_on_error:
+                raise AIConnectionError("Ollama", self._last_error)
+            return FallbackMessage(context.original_message)
 
+        # Every style but DETAILED wants a single line, so stop reading (which
+        # closes the connection and ends generation) once the first line is done
+        single_line = style != MessageStyle.DETAILED
+        text = ""
         try:
-            response = await self.client.post(
+            async with self.client.stream(
+                "POST",
                 f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.3,
-                        "top_p": 0.9,
-                    },
-                },
-            )
-            response.raise_for_status()
-            result = response.json()
-            return self._parse_response(result.get("response", ""), style)
+                content=_encode_json(
+                    {
+                        "model": self.model_for(style),
+                        # Per-style instructions as the system prompt, so the
+                        # templated prompt starts with the same prefix every commit
+                        "system": instructions,
+                        "prompt": details,
+                        "stream": True,
+                        "options": {
+                            "temperature": 0.3,
+                            "top_p": 0.9,
+                        },
+                    }
+                ),
+                headers=self.headers,
+                timeout=self.timeout,
+            ) as response:
+                response.raise_for_status()
+                self.breaker.record_success()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    try:
+                        chunk = _decode_json(line)
+                    except ValueError as e:  # json's and orjson's decode errors
+                        self._last_error = "Malformed response stream"
+                        logger.warning(f"ollama malformed line: {line[:200]!r}")
+                        if self.raise_on_error:
+                            raise AIConnectionError("Ollama", self._last_error, e) from e
+                        return FallbackMessage(context.original_message)
+                    text += chunk.get("response", "")
+                    if chunk.get("done") or (single_line and "\n" in text.lstrip()):
+                        break
+            if single_line:
+                text = text.lstrip().split("\n", 1)[0]
+            return self._parse_response(text, style)
         except httpx.ConnectError as e:
+            self.breaker.record_failure(e)
             self._last_error = f"Cannot connect to Ollama at {self.base_url}"
             logger.warning(f"ollama connect: {e}")
             if self.raise_on_error:
                 raise AIConnectionError("Ollama", self._last_error, e)
-            return context.original_message
+            return FallbackMessage(context.original_message)
         except httpx.HTTPError as e:
+            self.breaker.record_failure(e)
             self._last_error = str(e)
             logger.warning(f"ollama: {e}")
             if self.raise_on_error:
                 raise AIConnectionError("Ollama", self._last_error, e)
-            return context.original_message
+            return FallbackMessage(context.original_message)
 
     def _parse_response(self, response: str, style: MessageStyle) -> str:
         """Parse response."""
         message = response.strip().strip("\"'")
 
         # Ensure proper format for conventional commits
-        if style == MessageStyle.CONVENTIONAL:
-            valid_prefixes = [
-                "feat:",
-                "fix:",
-                "docs:",
-                "style:",
-                "refactor:",
-                "test:",
-                "chore:",
-                "perf:",
-                "ci:",
-                "build:",
-                "revert:",
-            ]
-            has_prefix = any(message.lower().startswith(p) for p in valid_prefixes)
-            if not has_prefix:
-                # Try to infer the type
-                message = f"chore: {message}"
+        if style == MessageStyle.CONVENTIONAL and not _CONVENTIONAL_PREFIX_RE.match(message):
+            # Try to infer the type
+            message = f"chore: {message}"
 
         return message
 
     async def close(self):
-        await self.client.aclose()
+        # The shared client outlives providers; see close_shared_clients()
+        if self._client is not None:
+            await self._client.aclose()
 
 
 class OpenAIProvider:
     """OpenAI provider."""
 
-    def __init__(self, api_key: str, model: str = "gpt-4o-mini", raise_on_error: bool = True):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-4o-mini",
+        raise_on_error: bool = True,
+        shared_client: bool = False,
+        max_connections: int | None = None,
+        model_tiers: dict[MessageStyle | str, str] | None = None,
+    ):
         self.api_key = api_key
         self.model = model
         self.raise_on_error = raise_on_error
-        self.client = httpx.AsyncClient(
-            timeout=30.0,
-            headers={"Authorization": f"Bearer {api_key}"},
+        self.timeout = 30.0
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "content-type": "application/json",
+        }
+        self.max_connections = max_connections
+        # Per-style model overrides, e.g. a small model for one-line styles
+        self.model_tiers = {MessageStyle(k): v for k, v in (model_tiers or {}).items()}
+        self.breaker = CircuitBreaker()
+        self._client = (
+            None
+            if shared_client
+            else httpx.AsyncClient(
+                timeout=self.timeout,
+                headers=self.headers,
+                limits=_pool_limits(max_connections),
+                http2=HTTP2_AVAILABLE,
+            )
         )
         self._last_error: str | None = None
 
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client if self._client is not None else get_shared_client(self.max_connections)
+
+    def model_for(self, style: MessageStyle) -> str:
+        """Model used for style: its tier if configured, else the default model."""
+        return self.model_tiers.get(style, self.model)
+
     async def check_connection(self) -> tuple[bool, str]:
         """Check connection."""
         try:
             response = await self.client.get(
                 "https://api.openai.com/v1/models",
+                headers=self.headers,
                 timeout=5.0,
             )
             if response.status_code == 401:
@@ -249,79 +645,162 @@ class OpenAIProvider:
 
     async def generate_message(self, context: CommitContext, style: MessageStyle) -> str:
         """Generate message."""
-        prompt = build_prompt(context, style)
+        instructions, details = build_prompt_parts(context, style)
         self._last_error = None
+        if not self.breaker.allow():
+            self._last_error = CIRCUIT_OPEN_MESSAGE
+            if self.raise_on_error:
+                raise AIConnectionError("OpenAI", self._last_error)
+            return FallbackMessage(context.original_message)
 
         try:
             response = await self.client.post(
                 "https://api.openai.com/v1/chat/completions",
-                json={
-                    "model": self.model,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are a git commit message writer. Respond only with the commit message.",
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
-                    "temperature": 0.3,
-                    "max_tokens": 200,
-                },
+                content=_encode_json(
+                    {
+                        "model": self.model_for(style),
+                        # Static instructions first: OpenAI caches repeated prompt prefixes
+                        "messages": [
+                            {"role": "system", "content": instructions},
+                            {"role": "user", "content": details},
+                        ],
+                        "temperature": 0.3,
+                        "max_tokens": 200,
+                    }
+                ),
+                headers=self.headers,
+                timeout=self.timeout,
             )
             response.raise_for_status()
-            result = response.json()
+            self.breaker.record_success()
+            result = _decode_json(response.content)
             try:
                 message = result["choices"][0]["message"]["content"]
             except (KeyError, IndexError, TypeError):
                 logger.warning(f"openai unexpected response: {result}")
                 if self.raise_on_error:
                     raise AIConnectionError("OpenAI", "Unexpected response format")
-                return context.original_message
+                return FallbackMessage(context.original_message)
             return message.strip().strip("\"'") if message else context.original_message
         except httpx.ConnectError as e:
+            self.breaker.record_failure(e)
             self._last_error = "Cannot connect to OpenAI"
             logger.warning(f"openai connect: {e}")
             if self.raise_on_error:
                 raise AIConnectionError("OpenAI", self._last_error, e)
-            return context.original_message
+            return FallbackMessage(context.original_message)
         except httpx.HTTPError as e:
+            self.breaker.record_failure(e)
             self._last_error = str(e)
             logger.warning(f"openai: {e}")
             if self.raise_on_error:
                 raise AIConnectionError("OpenAI", self._last_error, e)
-            return context.original_message
+            return FallbackMessage(context.original_message)
+
+    async def generate_messages_batch(
+        self, contexts: list[CommitContext], style: MessageStyle
+    ) -> list[str]:
+        """Generate messages for several commits in one request; always raises on failure."""
+        instructions, details = build_batch_prompt_parts(contexts, style)
+        self._last_error = None
+        if not self.breaker.allow():
+            self._last_error = CIRCUIT_OPEN_MESSAGE
+            raise AIConnectionError("OpenAI", self._last_error)
+
+        try:
+            response = await self.client.post(
+                "https://api.openai.com/v1/chat/completions",
+                content=_encode_json(
+                    {
+                        "model": self.model_for(style),
+                        "messages": [
+                            {"role": "system", "content": instructions},
+                            {"role": "user", "content": details},
+                        ],
+                        "temperature": 0.3,
+                        "max_tokens": 200 * len(contexts),
+                        "response_format": {"type": "json_object"},
+                    }
+                ),
+                headers=self.headers,
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            self.breaker.record_success()
+            result = _decode_json(response.content)
+            return _parse_batch_reply(result["choices"][0]["message"]["content"], len(contexts))
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            self._last_error = "Unexpected batch response format"
+            raise AIConnectionError("OpenAI", self._last_error, e)
+        except httpx.HTTPError as e:
+            self.breaker.record_failure(e)
+            self._last_error = str(e)
+            raise AIConnectionError("OpenAI", self._last_error, e)
 
     async def close(self):
-        await self.client.aclose()
+        # The shared client outlives providers; see close_shared_clients()
+        if self._client is not None:
+            await self._client.aclose()
 
 
 class AnthropicProvider:
     """Anthropic provider."""
 
-    def __init__(self, api_key: str, model: str = "claude-sonnet-4-20250514", raise_on_error: bool = True):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "claude-sonnet-4-20250514",
+        raise_on_error: bool = True,
+        shared_client: bool = False,
+        max_connections: int | None = None,
+        model_tiers: dict[MessageStyle | str, str] | None = None,
+    ):
         self.api_key = api_key
         self.model = model
         self.raise_on_error = raise_on_error
-        self.client = httpx.AsyncClient(
-            timeout=30.0,
-            headers={
-                "x-api-key": api_key,
-                "anthropic-version": "2024-01-01",
-                "content-type": "application/json",
-            },
+        self.timeout = 30.0
+        self.headers = {
+            "x-api-key": api_key,
+            "anthropic-version": "2024-01-01",
+            "content-type": "application/json",
+        }
+        self.max_connections = max_connections
+        # Per-style model overrides, e.g. a small model for one-line styles
+        self.model_tiers = {MessageStyle(k): v for k, v in (model_tiers or {}).items()}
+        self.breaker = CircuitBreaker()
+        self._client = (
+            None
+            if shared_client
+            else httpx.AsyncClient(
+                timeout=self.timeout,
+                headers=self.headers,
+                limits=_pool_limits(max_connections),
+                http2=HTTP2_AVAILABLE,
+            )
         )
         self._last_error: str | None = None
 
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client if self._client is not None else get_shared_client(self.max_connections)
+
+    def model_for(self, style: MessageStyle) -> str:
+        """Model used for style: its tier if configured, else the default model."""
+        return self.model_tiers.get(style, self.model)
+
     async def check_connection(self) -> tuple[bool, str]:
         """Check connection."""
         try:
             response = await self.client.post(
                 "https://api.anthropic.com/v1/messages",
-                json={
-                    "model": self.model,
-                    "max_tokens": 1,
-                    "messages": [{"role": "user", "content": "hi"}],
-                },
+                content=_encode_json(
+                    {
+                        "model": self.model,
+                        "max_tokens": 1,
+                        "messages": [{"role": "user", "content": "hi"}],
+                    }
+                ),
+                headers=self.headers,
                 timeout=5.0,
             )
             if response.status_code == 401:
@@ -337,44 +816,178 @@ class AnthropicProvider:
 
     async def generate_message(self, context: CommitContext, style: MessageStyle) -> str:
         """Generate message."""
-        prompt = build_prompt(context, style)
+        instructions, details = build_prompt_parts(context, style)
         self._last_error = None
+        if not self.breaker.allow():
+            self._last_error = CIRCUIT_OPEN_MESSAGE
+            if self.raise_on_error:
+                raise AIConnectionError("Anthropic", self._last_error)
+            return FallbackMessage(context.original_message)
 
         try:
             response = await self.client.post(
                 "https://api.anthropic.com/v1/messages",
-                json={
-                    "model": self.model,
-                    "max_tokens": 200,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "system": "You are a git commit message writer. Respond only with the commit message, nothing else.",
-                },
+                content=_encode_json(
+                    {
+                        "model": self.model_for(style),
+                        "max_tokens": 200,
+                        # Mark the per-style instructions as a cacheable prefix
+                        "system": [
+                            {
+                                "type": "text",
+                                "text": instructions,
+                                "cache_control": {"type": "ephemeral"},
+                            }
+                        ],
+                        "messages": [{"role": "user", "content": details}],
+                    }
+                ),
+                headers=self.headers,
+                timeout=self.timeout,
             )
             response.raise_for_status()
-            result = response.json()
+            self.breaker.record_success()
+            result = _decode_json(response.content)
             try:
                 message = result["content"][0]["text"]
             except (KeyError, IndexError, TypeError):
                 logger.warning(f"anthropic unexpected response: {result}")
                 if self.raise_on_error:
                     raise AIConnectionError("Anthropic", "Unexpected response format")
-                return context.original_message
+                return FallbackMessage(context.original_message)
             return message.strip().strip("\"'") if message else context.original_message
         except httpx.ConnectError as e:
+            self.breaker.record_failure(e)
             self._last_error = "Cannot connect to Anthropic"
             logger.warning(f"anthropic connect: {e}")
             if self.raise_on_error:
                 raise AIConnectionError("Anthropic", self._last_error, e)
-            return context.original_message
+            return FallbackMessage(context.original_message)
         except httpx.HTTPError as e:
+            self.breaker.record_failure(e)
             self._last_error = str(e)
             logger.warning(f"anthropic: {e}")
             if self.raise_on_error:
                 raise AIConnectionError("Anthropic", self._last_error, e)
-            return context.original_message
+            return FallbackMessage(context.original_message)
+
+    async def generate_messages_batch(
+        self, contexts: list[CommitContext], style: MessageStyle
+    ) -> list[str]:
+        """Generate messages for several commits in one request; always raises on failure."""
+        instructions, details = build_batch_prompt_parts(contexts, style)
+        self._last_error = None
+        if not self.breaker.allow():
+            self._last_error = CIRCUIT_OPEN_MESSAGE
+            raise AIConnectionError("Anthropic", self._last_error)
+
+        try:
+            response = await self.client.post(
+                "https://api.anthropic.com/v1/messages",
+                content=_encode_json(
+                    {
+                        "model": self.model_for(style),
+                        "max_tokens": 200 * len(contexts),
+                        "system": [
+                            {
+                                "type": "text",
+                                "text": instructions,
+                                "cache_control": {"type": "ephemeral"},
+                            }
+                        ],
+                        "messages": [{"role": "user", "content": details}],
+                    }
+                ),
+                headers=self.headers,
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            self.breaker.record_success()
+            result = _decode_json(response.content)
+            return _parse_batch_reply(result["content"][0]["text"], len(contexts))
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            self._last_error = "Unexpected batch response format"
+            raise AIConnectionError("Anthropic", self._last_error, e)
+        except httpx.HTTPError as e:
+            self.breaker.record_failure(e)
+            self._last_error = str(e)
+            raise AIConnectionError("Anthropic", self._last_error, e)
+
+    async def close(self):
+        # The shared client outlives providers; see close_shared_clients()
+        if self._client is not None:
+            await self._client.aclose()
+
+
+class FallbackProvider:
+    """
+    Ordered providers with hedged requests.
+
+    The first provider is asked right away; each later one is started when the
+    requests in flight have not answered within stagger seconds, or as soon as
+    one of them fails. The first answer wins and the other requests are
+    cancelled.
+    """
+
+    def __init__(self, providers: list[AIProvider], stagger: float = 5.0):
+        if not providers:
+            raise ValueError("FallbackProvider needs at least one provider")
+        self.providers = list(providers)
+        self.stagger = stagger
+        self.model = "+".join(getattr(p, "model", "") for p in self.providers)  # For cache keys
+        self._last_error: str | None = None
+
+    async def check_connection(self) -> tuple[bool, str]:
+        """Connected if any provider is."""
+        statuses = []
+        for provider in self.providers:
+            if not hasattr(provider, "check_connection"):
+                return True, "Connected"
+            connected, status = await provider.check_connection()
+            if connected:
+                return True, "Connected"
+            statuses.append(status)
+        return False, "; ".join(statuses)
+
+    async def generate_message(self, context: CommitContext, style: MessageStyle) -> str:
+        """Generate message with the first provider to answer."""
+        self._last_error = None
+        pending: set[asyncio.Task] = set()
+        errors: list[BaseException] = []
+        waiting = iter(self.providers)
+        try:
+            while True:
+                provider = next(waiting, None)
+                if provider is not None:
+                    pending.add(asyncio.create_task(provider.generate_message(context, style)))
+                elif not pending:
+                    break
+                # Give the requests in flight a head start before hedging
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=None if provider is None else self.stagger,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.cancelled():
+                        # Cancelled from outside, e.g. a provider cancelling itself
+                        errors.append(asyncio.CancelledError())
+                        continue
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    errors.append(error)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        self._last_error = str(errors[-1])
+        raise AIConnectionError("Fallback", f"all providers failed: {self._last_error}", errors[-1])
 
     async def close(self):
-        await self.client.aclose()
+        for provider in self.providers:
+            if hasattr(provider, "close"):
+                await provider.close()
 
 
 class AICommitEngine:
@@ -384,9 +997,15 @@ class AICommitEngine:
         self,
         provider: AIProvider | None = None,
         style: MessageStyle = MessageStyle.CONVENTIONAL,
+        cache: RewriteCache | None = None,
+        max_inflight: int = 16,
     ):
         self.provider = provider or OllamaProvider()
         self.style = style
+        self.cache = cache
+        self.max_inflight = max_inflight
+        # Content key -> pending provider request, shared by identical commits
+        self._inflight: dict[str, asyncio.Future[str]] = {}
 
     async def rewrite_message(
         self,
@@ -402,44 +1021,223 @@ class AICommitEngine:
             files_changed=files_changed or [],
             diff_summary=diff_summary,
         )
-
-        new_message = await self.provider.generate_message(context, self.style)
-
-        return RewriteResult(
-            original=original_message,
+        return await self.rewrite(context)
+
+    async def rewrite(self, context: CommitContext) -> RewriteResult:
+        """Rewrite the message of one commit context."""
+        key = self._cache_key(context)
+        cached = self._cached(context, key)
+        if cached is not None:
+            return cached
+
+        # Identical commits rewritten at the same time ("wip", "fix", ...) share
+        # one request; the check and the insert below don't yield to the loop
+        flight_key = key or self._content_key(context)
+        while (pending := self._inflight.get(flight_key)) is not None:
+            try:
+                new_message = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # We were cancelled, not the shared request
+                continue  # Its caller went away; make the request ourselves
+            return self._result(context, new_message, None)
+
+        pending = asyncio.get_running_loop().create_future()
+        self._inflight[flight_key] = pending
+        try:
+            new_message = await self.provider.generate_message(context, self.style)
+        except Exception as e:
+            pending.set_exception(e)
+            pending.exception()  # Mark retrieved: nobody may be waiting
+            raise
+        except BaseException:
+            pending.cancel()
+            raise
+        else:
+            pending.set_result(new_message)
+        finally:
+            del self._inflight[flight_key]
+        return self._result(context, new_message, key)
+
+    def _cache_key(self, context: CommitContext) -> str | None:
+        if self.cache is None:
+            return None
+        return self._content_key(context)
+
+    def _content_key(self, context: CommitContext) -> str:
+        if hasattr(self.provider, "model_for"):
+            model_name = self.provider.model_for(self.style)
+        else:
+            model_name = getattr(self.provider, "model", "")
+        model = f"{type(self.provider).__name__}:{model_name}"
+        return RewriteCache.make_key(context, self.style, model)
+
+    def _cached(self, context: CommitContext, key: str | None) -> RewriteResult | None:
+        cached = None if key is None else self.cache.get(key)
+        if cached is None:
+            return None
+        return replace(cached, commit_hash=context.commit_hash, from_cache=True)
+
+    def _result(self, context: CommitContext, new_message: str, key: str | None) -> RewriteResult:
+        result = RewriteResult(
+            original=context.original_message,
             rewritten=new_message,
-            commit_hash=commit_hash,
+            commit_hash=context.commit_hash,
         )
+        # Providers with raise_on_error=False fall back to the original
+        # message; don't pin that fallback in the cache
+        if key is not None and not isinstance(new_message, FallbackMessage):
+            self.cache.put(key, result)
+        return result
 
     async def rewrite_batch(
         self,
         commits: list[tuple[str, str, list[str]]],
     ) -> list[RewriteResult]:
-        """Batch rewrite."""
-        results = []
-        for commit_hash, message, files in commits:
-            result = await self.rewrite_message(message, commit_hash, files)
-            results.append(result)
+        """
+        Batch rewrite, issuing up to max_inflight requests concurrently.
+
+        Providers with generate_messages_batch get PROMPT_BATCH_SIZE commits per
+        request instead of one.
+        """
+        contexts = [
+            CommitContext(
+                original_message=message, commit_hash=commit_hash, files_changed=files or []
+            )
+            for commit_hash, message, files in commits
+        ]
+        size = PROMPT_BATCH_SIZE if hasattr(self.provider, "generate_messages_batch") else 1
+        semaphore = asyncio.Semaphore(self.max_inflight)
+
+        async def rewrite_chunk(chunk: list[CommitContext]) -> list[RewriteResult]:
+            if size > 1:
+                return await self._rewrite_chunk(chunk, semaphore)
+            async with semaphore:
+                return [await self.rewrite(chunk[0])]
+
+        tasks = [
+            asyncio.ensure_future(rewrite_chunk(contexts[start : start + size]))
+            for start in range(0, len(contexts), size)
+        ]
+        try:
+            return [result for chunk in await asyncio.gather(*tasks) for result in chunk]
+        except BaseException:
+            # First failure (or our own cancellation) stops the rest
+            for task in tasks:
+                task.cancel()
+            raise
+
+    async def _rewrite_chunk(
+        self, contexts: list[CommitContext], semaphore: asyncio.Semaphore
+    ) -> list[RewriteResult]:
+        """Rewrite several commits with one batch request (cache hits excluded).
+
+        Every request, the batch one and any per-commit retries, holds its own
+        semaphore slot.
+        """
+        keys = [self._cache_key(context) for context in contexts]
+        results = [self._cached(context, key) for context, key in zip(contexts, keys)]
+        misses = [i for i, result in enumerate(results) if result is None]
+        if not misses:
+            return results
+
+        async def retry(context: CommitContext) -> RewriteResult:
+            async with semaphore:
+                return await self.rewrite(context)
+
+        try:
+            async with semaphore:
+                messages = await self.provider.generate_messages_batch(
+                    [contexts[i] for i in misses], self.style
+                )
+        except AIConnectionError as e:
+            # Malformed batch replies happen; one request per commit still works
+            logger.warning(f"batch rewrite failed, retrying per commit: {e}")
+            fresh = await asyncio.gather(*(retry(contexts[i]) for i in misses))
+        else:
+            fresh = [
+                self._result(contexts[i], message, keys[i]) for i, message in zip(misses, messages)
+            ]
+        for i, result in zip(misses, fresh):
+            results[i] = result
         return results
 
+    async def rewrite_many(
+        self,
+        contexts: Iterable[CommitContext],
+        *,
+        max_inflight: int | None = None,
+    ) -> AsyncIterator[RewriteResult]:
+        """
+        Rewrite many commits concurrently, yielding results as they finish.
+
+        At most max_inflight requests run at once. A failed rewrite does not
+        abort the others; it is yielded with ``error`` set and the original
+        message kept.
+        """
+        semaphore = asyncio.Semaphore(max_inflight or self.max_inflight)
+
+        async def rewrite_one(context: CommitContext) -> RewriteResult:
+            async with semaphore:
+                try:
+                    return await self.rewrite(context)
+                except (AIConnectionError, httpx.HTTPError) as e:
+                    logger.warning(f"rewrite failed {context.commit_hash[:8]}: {e}")
+                    return RewriteResult(
+                        original=context.original_message,
+                        rewritten=context.original_message,
+                        commit_hash=context.commit_hash,
+                        error=str(e),
+                    )
+
+        tasks = [asyncio.create_task(rewrite_one(context)) for context in contexts]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Consumer stopped early; don't leave requests running
+            for task in tasks:
+                task.cancel()
+
     def create_callback(self) -> Callable[[str, str], str]:
-        """Create callback for git-filter-repo."""
+        """
+        Create callback for git-filter-repo.
+
+        Rewrites run on one event loop in a daemon thread, so callers on several
+        threads keep several requests in flight. Call ``callback.close()`` to stop
+        the loop.
+        """
         cache: dict[str, str] = {}
         loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, name="rewrite-callback", daemon=True)
+        thread.start()
 
         def callback(message: str, commit_hash: str) -> str:
             if commit_hash in cache:
                 return cache[commit_hash]
 
+            future = asyncio.run_coroutine_threadsafe(
+                self.rewrite_message(message, commit_hash), loop
+            )
             try:
-                result = loop.run_until_complete(self.rewrite_message(message, commit_hash))
-                cache[commit_hash] = result.rewritten
-                return result.rewritten
-            except Exception as e:
+                result = future.result()
+            except (AIConnectionError, httpx.HTTPError) as e:
                 logger.error(f"rewrite failed {commit_hash[:8]}: {e}")
                 return message
+            cache[commit_hash] = result.rewritten
+            return result.rewritten
+
+        def close() -> None:
+            if loop.is_closed():
+                return
+            # Shared clients opened on this loop can't be closed from any other
+            asyncio.run_coroutine_threadsafe(close_shared_clients(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
 
         callback._loop = loop  # type: ignore
+        callback.close = close  # type: ignore
         return callback
 
     async def close(self):
@@ -463,31 +1261,71 @@ async def rewrite_with_ollama(
         await engine.close()
 
 
+# Provider name -> (class, label, settings with defaults). A None default
+# marks a required setting.
+_PROVIDER_REGISTRY: dict[str, tuple[type, str, dict[str, str | None]]] = {
+    "ollama": (
+        OllamaProvider,
+        "Ollama",
+        {"base_url": "http://localhost:11434", "model": "llama3.2"},
+    ),
+    "openai": (OpenAIProvider, "OpenAI", {"api_key": None, "model": "gpt-4o-mini"}),
+    "anthropic": (
+        AnthropicProvider,
+        "Anthropic",
+        {"api_key": None, "model": "claude-sonnet-4-20250514"},
+    ),
+}
+
+_provider_cache: dict[tuple[str, ...], AIProvider] = {}
+
+
+def _fingerprint(secret: str) -> str:
+    """Stable identifier for a secret that doesn't keep it in cache keys."""
+    return hashlib.blake2b(secret.encode(), digest_size=8).hexdigest()
+
+
 def get_provider(
     provider_type: str = "ollama",
+    max_connections: int | None = None,
+    model_tiers: dict[str, str] | None = None,
     **kwargs,
 ) -> AIProvider:
-    """Provider factory."""
-    if provider_type == "ollama":
-        return OllamaProvider(
-            base_url=kwargs.get("base_url", "http://localhost:11434"),
-            model=kwargs.get("model", "llama3.2"),
-        )
-    elif provider_type == "openai":
-        api_key = kwargs.get("api_key")
-        if not api_key:
-            raise ValueError("OpenAI API key required")
-        return OpenAIProvider(
-            api_key=api_key,
-            model=kwargs.get("model", "gpt-4o-mini"),
-        )
-    elif provider_type == "anthropic":
-        api_key = kwargs.get("api_key")
-        if not api_key:
-            raise ValueError("Anthropic API key required")
-        return AnthropicProvider(
-            api_key=api_key,
-            model=kwargs.get("model", "claude-sonnet-4-20250514"),
-        )
-    else:
+    """
+    Provider factory.
+
+    Providers are reused for identical settings and share one pooled HTTP
+    client per event loop (and max_connections pool size), so repeated tool
+    calls don't rebuild them.
+    """
+    if provider_type == "fallback":
+        # Wraps already-built providers, so there is nothing to cache by settings
+        if not kwargs.get("providers"):
+            raise ValueError("Fallback providers required")
+        return FallbackProvider(kwargs["providers"], kwargs.get("stagger", 5.0))
+
+    entry = _PROVIDER_REGISTRY.get(provider_type)
+    if entry is None:
         raise ValueError(f"Unknown provider: {provider_type}")
+    provider_class, label, defaults = entry
+
+    settings = {name: kwargs.get(name, default) for name, default in defaults.items()}
+    if "api_key" in settings and not settings["api_key"]:
+        raise ValueError(f"{label} API key required")
+
+    tiers = tuple(sorted((model_tiers or {}).items()))
+    cache_key = (provider_type, str(max_connections), str(tiers)) + tuple(
+        _fingerprint(value) if name == "api_key" else str(value) for name, value in settings.items()
+    )
+    provider = _provider_cache.get(cache_key)
+    if provider is None:
+        provider = provider_class(
+            **settings, shared_client=True, max_connections=max_connections, model_tiers=model_tiers
+        )
+        _provider_cache[cache_key] = provider
+    return provider
+
+
+def clear_provider_cache() -> None:
+    """Forget cached providers (e.g. after changing credentials)."""
+    _provider_cache.clear()
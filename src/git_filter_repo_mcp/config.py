@@ -1,10 +1,11 @@
 """Configuration management for git-filter-repo-mcp."""
 
+import functools
 import json
 import logging
 import os
 import threading
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from pathlib import Path
 from typing import Literal
 
@@ -18,6 +19,9 @@ class AIConfig:
     provider: Literal["ollama", "openai", "anthropic", "none"] = "ollama"
     model: str = "llama3.2"
 
+    # Style -> model overrides, e.g. {"simple": "llama3.2:1b"}; others use model
+    model_tiers: dict[str, str] = field(default_factory=dict)
+
     # Ollama settings
     ollama_base_url: str = "http://localhost:11434"
 
@@ -28,6 +32,18 @@ class AIConfig:
     # Anthropic settings
     anthropic_api_key: str | None = None
 
+    # Seconds a rewritten message is reused for identical commits (0 disables)
+    cache_ttl: int = 3600
+
+    # SQLite file that keeps rewritten messages across runs (None: memory only)
+    cache_path: str | None = None
+
+    # Concurrent provider requests when rewriting many commits
+    max_inflight: int = 16
+
+    # HTTP connection pool size shared by the providers (half kept alive when idle)
+    max_connections: int = 100
+
 
 @dataclass
 class ServerConfig:
@@ -57,17 +73,10 @@ def load_config() -> Config:
     config = Config()
 
     # Load from config files
-    config_paths = [
-        Path("./config.json"),
-        Path.home() / ".config" / "git-filter-repo-mcp" / "config.json",
-    ]
-
-    for config_path in reversed(config_paths):  # Lower priority first
+    for config_path in reversed(_config_paths()):  # Lower priority first
         if config_path.exists():
             try:
-                with open(config_path) as f:
-                    data = json.load(f)
-                    _apply_config_dict(config, data)
+                _apply_config_dict(config, _read_config_file(config_path))
             except json.JSONDecodeError as e:
                 logger.warning(f"Failed to parse config file {config_path}: {e}")
             except IOError as e:
@@ -79,31 +88,58 @@ def load_config() -> Config:
     return config
 
 
+def _config_paths() -> list[Path]:
+    """Config file locations, highest priority first."""
+    return [
+        Path("./config.json"),
+        Path.home() / ".config" / "git-filter-repo-mcp" / "config.json",
+    ]
+
+
+# Parsed config files by (absolute path, mtime, size), so reloads skip the JSON
+# decode of unchanged files
+_parsed_files: dict[tuple[str, int, int], dict] = {}
+_PARSED_FILES_MAX = 8
+
+
+def _read_config_file(config_path: Path) -> dict:
+    """Parse a config file, reusing the previous parse while it is unchanged."""
+    st = config_path.stat()
+    key = (str(config_path.absolute()), st.st_mtime_ns, st.st_size)
+    data = _parsed_files.get(key)
+    if data is None:
+        with open(config_path) as f:
+            data = json.load(f)
+        if len(_parsed_files) >= _PARSED_FILES_MAX:
+            _parsed_files.pop(next(iter(_parsed_files)), None)
+        _parsed_files[key] = data
+    return data
+
+
+def _config_stamp() -> tuple[int | None, ...]:
+    """Modification times of the config files (None for missing ones)."""
+    stamp = []
+    for config_path in _config_paths():
+        try:
+            stamp.append(config_path.stat().st_mtime_ns)
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
 def _apply_config_dict(config: Config, data: dict) -> None:
-    """Apply configuration from a dictionary."""
-    if "ai" in data:
-        ai_data = data["ai"]
-        if "provider" in ai_data:
-            config.ai.provider = ai_data["provider"]
-        if "model" in ai_data:
-            config.ai.model = ai_data["model"]
-        if "ollama_base_url" in ai_data:
-            config.ai.ollama_base_url = ai_data["ollama_base_url"]
-        if "openai_api_key" in ai_data:
-            config.ai.openai_api_key = ai_data["openai_api_key"]
-        if "openai_base_url" in ai_data:
-            config.ai.openai_base_url = ai_data["openai_base_url"]
-        if "anthropic_api_key" in ai_data:
-            config.ai.anthropic_api_key = ai_data["anthropic_api_key"]
-
-    if "server" in data:
-        server_data = data["server"]
-        if "log_level" in server_data:
-            config.server.log_level = server_data["log_level"]
-        if "default_dry_run" in server_data:
-            config.server.default_dry_run = server_data["default_dry_run"]
-        if "auto_backup" in server_data:
-            config.server.auto_backup = server_data["auto_backup"]
+    """Apply configuration from a dictionary; unknown keys are ignored."""
+    for section_name, section in (("ai", config.ai), ("server", config.server)):
+        names = _field_names(type(section))
+        for key, value in data.get(section_name, {}).items():
+            if key in names:
+                # Copy containers: parsed data is cached (see _read_config_file)
+                setattr(section, key, dict(value) if isinstance(value, dict) else value)
+
+
+@functools.cache
+def _field_names(cls: type) -> frozenset[str]:
+    return frozenset(f.name for f in fields(cls))
 
 
 def _apply_env_vars(config: Config) -> None:
@@ -143,10 +179,15 @@ def create_default_config_file(path: Path | None = None) -> Path:
         "ai": {
             "provider": "ollama",
             "model": "llama3.2",
+            "model_tiers": {},
             "ollama_base_url": "http://localhost:11434",
             "openai_api_key": None,
             "openai_base_url": "https://api.openai.com/v1",
             "anthropic_api_key": None,
+            "cache_ttl": 3600,
+            "cache_path": None,
+            "max_inflight": 16,
+            "max_connections": 100,
         },
         "server": {"log_level": "INFO", "default_dry_run": True, "auto_backup": True},
     }
@@ -157,25 +198,35 @@ def create_default_config_file(path: Path | None = None) -> Path:
     return path
 
 
-# Thread-safe global config instance
-_config: Config | None = None
+# Global config instance with the config file mtimes it was loaded from. Kept
+# in one tuple so readers never see a config paired with another load's stamp
+_loaded: tuple[tuple[int | None, ...], Config] | None = None
 _config_lock = threading.Lock()
 
 
 def get_config() -> Config:
-    """Get the global configuration instance (thread-safe)."""
-    global _config
-    if _config is None:
-        with _config_lock:
-            # Double-check locking pattern
-            if _config is None:
-                _config = load_config()
-    return _config
+    """
+    Get the global configuration instance (thread-safe).
+
+    Costs a stat() per config file; the files are only re-parsed when one of
+    them was created, modified or removed since the last load. Only reloads
+    take the lock.
+    """
+    global _loaded
+    stamp = _config_stamp()
+    loaded = _loaded
+    if loaded is not None and loaded[0] == stamp:
+        return loaded[1]
+    with _config_lock:
+        # Another thread may have reloaded while we waited
+        if _loaded is None or _loaded[0] != stamp:
+            _loaded = (stamp, load_config())
+        return _loaded[1]
 
 
 def reload_config() -> Config:
     """Reload configuration from sources (thread-safe)."""
-    global _config
+    global _loaded
     with _config_lock:
-        _config = load_config()
-        return _config
+        _loaded = (_config_stamp(), load_config())
+        return _loaded[1]
@@ -1,21 +1,59 @@
 """Secret detection utilities for git history scanning."""
 
 import fnmatch
+import functools
 import hashlib
+import logging
+import os
 import re
-from dataclasses import dataclass
-from pathlib import Path
-from typing import Pattern
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from re import Pattern
+from typing import Any, AnyStr, TextIO
+
+try:
+    from re import _parser as _sre_parse  # type: ignore[attr-defined]  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse
+
+try:
+    import hyperscan  # type: ignore[import-not-found]
+except ImportError:  # Optional multi-pattern DFA prefilter, see the "fast" extra
+    hyperscan = None
+
+logger = logging.getLogger(__name__)
+
+# Set once Hyperscan fails to compile or scan; the combined regex is used from then on
+_hyperscan_failed = False
+
+
+def _literal_prefix(pattern: Pattern[str]) -> str:
+    """Longest literal that every match of the pattern starts with ("" if none)."""
+    if pattern.flags & re.IGNORECASE:
+        return ""
+    prefix = []
+    for op, arg in _sre_parse.parse(pattern.pattern, pattern.flags):
+        if op is not _sre_parse.LITERAL:
+            break
+        prefix.append(chr(arg))
+    return "".join(prefix)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SecretPattern:
     """Pattern for detecting secrets."""
 
     name: str
-    pattern: Pattern
+    pattern: Pattern[str]
     description: str
     severity: str = "high"  # high, medium, low
+    # Lowercase substrings, one of which every match contains; empty if unknown
+    anchors: tuple[str, ...] = ()
+    literal_prefix: str = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # Cheap substring test that rules the regex out before running it
+        object.__setattr__(self, "literal_prefix", _literal_prefix(self.pattern))
 
 
 # Common secret patterns
@@ -25,6 +63,7 @@ SECRET_PATTERNS: list[SecretPattern] = [
         pattern=re.compile(r"AKIA[0-9A-Z]{16}"),
         description="AWS Access Key ID",
         severity="high",
+        anchors=("akia",),
     ),
     SecretPattern(
         name="aws_secret_key",
@@ -33,36 +72,42 @@ SECRET_PATTERNS: list[SecretPattern] = [
         ),
         description="AWS Secret Key",
         severity="high",
+        anchors=("secret",),
     ),
     SecretPattern(
         name="github_token",
         pattern=re.compile(r"gh[pousr]_[A-Za-z0-9_]{36,}"),
         description="GitHub Token",
         severity="high",
+        anchors=("ghp_", "gho_", "ghu_", "ghs_", "ghr_"),
     ),
     SecretPattern(
         name="github_oauth",
         pattern=re.compile(r"gho_[A-Za-z0-9]{36}"),
         description="GitHub OAuth Token",
         severity="high",
+        anchors=("gho_",),
     ),
     SecretPattern(
         name="openai_api_key",
         pattern=re.compile(r"sk-[A-Za-z0-9]{48,}"),
         description="OpenAI API Key",
         severity="high",
+        anchors=("sk-",),
     ),
     SecretPattern(
         name="anthropic_api_key",
         pattern=re.compile(r"sk-ant-[A-Za-z0-9-]{40,}"),
         description="Anthropic API Key",
         severity="high",
+        anchors=("sk-ant-",),
     ),
     SecretPattern(
         name="slack_token",
         pattern=re.compile(r"xox[baprs]-[0-9]{10,13}-[0-9]{10,13}-[a-zA-Z0-9]{24}"),
         description="Slack Token",
         severity="high",
+        anchors=("xox",),
     ),
     SecretPattern(
         name="slack_webhook",
@@ -71,54 +116,63 @@ SECRET_PATTERNS: list[SecretPattern] = [
         ),
         description="Slack Webhook URL",
         severity="medium",
+        anchors=("hooks.slack.com",),
     ),
     SecretPattern(
         name="stripe_key",
         pattern=re.compile(r"sk_live_[A-Za-z0-9]{24,}"),
         description="Stripe Live Key",
         severity="high",
+        anchors=("sk_live_",),
     ),
     SecretPattern(
         name="stripe_test_key",
         pattern=re.compile(r"sk_test_[A-Za-z0-9]{24,}"),
         description="Stripe Test Key",
         severity="low",
+        anchors=("sk_test_",),
     ),
     SecretPattern(
         name="google_api_key",
         pattern=re.compile(r"AIza[0-9A-Za-z-_]{35}"),
         description="Google API Key",
         severity="high",
+        anchors=("aiza",),
     ),
     SecretPattern(
         name="firebase_key",
         pattern=re.compile(r"AAAA[A-Za-z0-9_-]{7}:[A-Za-z0-9_-]{140}"),
         description="Firebase Cloud Messaging Key",
         severity="high",
+        anchors=("aaaa",),
     ),
     SecretPattern(
         name="private_key",
         pattern=re.compile(r"-----BEGIN (RSA |EC |DSA |OPENSSH )?PRIVATE KEY-----"),
         description="Private Key File",
         severity="high",
+        anchors=("-----begin ",),
     ),
     SecretPattern(
         name="jwt_token",
         pattern=re.compile(r"eyJ[A-Za-z0-9-_]+\.eyJ[A-Za-z0-9-_]+\.[A-Za-z0-9-_]+"),
         description="JWT Token",
         severity="medium",
+        anchors=("eyj",),
     ),
     SecretPattern(
         name="basic_auth",
         pattern=re.compile(r"https?://[^/:@\s]+:[^/@\s]+@[^/\s]+"),
         description="URL with Basic Auth Credentials",
         severity="high",
+        anchors=("://",),
     ),
     SecretPattern(
         name="password_in_url",
         pattern=re.compile(r"[?&]password=[^&\s]+"),
         description="Password in URL Parameter",
         severity="high",
+        anchors=("password=",),
     ),
     SecretPattern(
         name="generic_secret",
@@ -127,6 +181,7 @@ SECRET_PATTERNS: list[SecretPattern] = [
         ),
         description="Generic Secret Assignment",
         severity="medium",
+        anchors=("api", "secret", "password", "token", "credential"),
     ),
     SecretPattern(
         name="env_secret",
@@ -136,9 +191,15 @@ SECRET_PATTERNS: list[SecretPattern] = [
         ),
         description="Environment Variable Secret",
         severity="medium",
+        anchors=("secret", "key", "token", "password", "credential"),
     ),
 ]
 
+# scan_stream window sizing (characters). The overlap bounds the longest
+# secret guaranteed to be matched across a chunk boundary.
+STREAM_CHUNK_SIZE = 1024 * 1024
+STREAM_OVERLAP = 4096
+
 # Files commonly containing secrets
 SENSITIVE_FILES = [
     ".env",
@@ -167,8 +228,146 @@ SENSITIVE_FILES = [
     "secrets.yml",
 ]
 
-
-@dataclass
+# Scoped inline-flag letters for flags a pattern may carry into the combined regex
+_INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x"))
+_LEADING_FLAGS_RE = re.compile(r"^\(\?[aiLmsux]+\)")
+
+
+def _scoped_source(pattern: Pattern[str]) -> str:
+    """Return a pattern's source with its flags scoped to a non-capturing group."""
+    # Global inline flags are only legal at the start of a regex, and they are
+    # already reflected in pattern.flags
+    source = _LEADING_FLAGS_RE.sub("", pattern.pattern)
+    letters = "".join(letter for flag, letter in _INLINE_FLAGS if pattern.flags & flag)
+    return f"(?{letters}:{source})" if letters else f"(?:{source})"
+
+
+@functools.cache
+def _combined_pattern() -> Pattern[str]:
+    """Single alternation of all SECRET_PATTERNS, compiled on first use.
+
+    One pass over the content answers "could anything match, and where is the
+    earliest candidate?" so clean files skip the per-pattern scans entirely.
+    """
+    return re.compile("|".join(_scoped_source(p.pattern) for p in SECRET_PATTERNS))
+
+
+@functools.cache
+def _combined_byte_pattern() -> Pattern[bytes]:
+    """_combined_pattern for bytes content."""
+    return re.compile(_combined_pattern().pattern.encode())
+
+
+@functools.cache
+def _byte_rules() -> tuple[tuple[Pattern[bytes], bytes, tuple[bytes, ...]], ...]:
+    """(regex, literal prefix, anchors) of each SECRET_PATTERNS entry, for bytes content."""
+    return tuple(
+        (
+            # Same source; bytes regexes take no UNICODE flag and fold case for ASCII only
+            re.compile(p.pattern.pattern.encode(), p.pattern.flags & ~re.UNICODE),
+            p.literal_prefix.encode(),
+            tuple(a.encode() for a in p.anchors),
+        )
+        for p in SECRET_PATTERNS
+    )
+
+
+def _rules(
+    content: AnyStr,
+) -> Iterable[tuple[SecretPattern, Pattern[AnyStr], AnyStr, tuple[AnyStr, ...]]]:
+    """Each SECRET_PATTERNS entry with its regex, literal prefix and anchors for content."""
+    if isinstance(content, bytes):
+        return (
+            (p, regex, prefix, anchors)
+            for p, (regex, prefix, anchors) in zip(SECRET_PATTERNS, _byte_rules())
+        )
+    return ((p, p.pattern, p.literal_prefix, p.anchors) for p in SECRET_PATTERNS)
+
+
+@functools.cache
+def _hyperscan_database() -> Any:
+    """All SECRET_PATTERNS in one Hyperscan database, compiled on first use."""
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[_scoped_source(p.pattern).encode() for p in SECRET_PATTERNS],
+        ids=list(range(len(SECRET_PATTERNS))),
+        elements=len(SECRET_PATTERNS),
+        flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * len(SECRET_PATTERNS),
+    )
+    return database
+
+
+def _first_candidate(content: AnyStr, pos: int, endpos: int | None = None) -> int | None:
+    """Offset of the leftmost match of any pattern starting in [pos, endpos), or None."""
+    global _hyperscan_failed
+    if (
+        hyperscan is not None
+        and not _hyperscan_failed
+        and (isinstance(content, bytes) or content.isascii())
+    ):
+        # Byte and character offsets agree on ASCII, and \s and case folding
+        # mean the same to both engines there (and on bytes)
+        data = content if isinstance(content, bytes) else content.encode("ascii")
+        try:
+            return _hyperscan_candidate(data, pos, endpos)
+        except hyperscan.error as e:
+            logger.warning(f"hyperscan failed, using the regex prefilter: {e}")
+            _hyperscan_failed = True
+    if isinstance(content, bytes):
+        hit = _combined_byte_pattern().search(content, pos)
+    else:
+        hit = _combined_pattern().search(content, pos)
+    if hit is None or (endpos is not None and hit.start() >= endpos):
+        return None
+    return hit.start()
+
+
+def _hyperscan_candidate(data: bytes, pos: int, endpos: int | None) -> int | None:
+    """_first_candidate via the Hyperscan database; raises hyperscan.error."""
+    # Only data[pos:] is scanned. No pattern looks behind, so a match starting
+    # at or after pos is still found; "^" may also fire at pos, which only
+    # costs the regex a look there
+    limit = len(data) - pos if endpos is None else endpos - pos
+    starts: list[int] = []
+
+    def on_match(pattern_id: int, start: int, end: int, flags: int, context: object) -> None:
+        if start < limit:
+            starts.append(start)
+
+    _hyperscan_database().scan(data[pos:], match_event_handler=on_match)
+    return None if not starts else pos + min(starts)
+
+
+@functools.cache
+def _anchors() -> tuple[str, ...] | None:
+    """Anchors of all SECRET_PATTERNS, or None if some pattern has none."""
+    if not all(p.anchors for p in SECRET_PATTERNS):
+        return None
+    return tuple(dict.fromkeys(a for p in SECRET_PATTERNS for a in p.anchors))
+
+
+@functools.cache
+def _byte_anchors() -> tuple[bytes, ...] | None:
+    """_anchors for bytes content."""
+    anchors = _anchors()
+    return None if anchors is None else tuple(a.encode() for a in anchors)
+
+
+def _present_anchors(content: AnyStr, pos: int) -> frozenset[AnyStr] | None:
+    """Anchors occurring in content[pos:], or None if they can't rule anything out."""
+    # Only ASCII lowercases exactly like IGNORECASE matching folds (e.g. "\u017f"
+    # matches "s"); bytes regexes fold ASCII only, so bytes always qualify
+    if isinstance(content, bytes):
+        anchors = _byte_anchors()
+    else:
+        anchors = _anchors() if content.isascii() else None
+    if anchors is None:
+        return None
+    folded = content.lower()
+    return frozenset(anchor for anchor in anchors if folded.find(anchor, pos) >= 0)
+
+
+@dataclass(slots=True, frozen=True)
 class SecretFinding:
     """A detected secret in the repository."""
 
@@ -180,8 +379,39 @@ class SecretFinding:
     line_number: int | None
     matched_text: str  # Redacted version
     context: str | None = None
-
-
+    start: int | None = None  # Offset of the match in the scanned content
+    end: int | None = None
+
+    @classmethod
+    def merge(cls, findings: list["SecretFinding"]) -> list["SecretFinding"]:
+        """
+        Drop findings overlapping an earlier finding of the same rule.
+
+        Spans are swept once per (rule, file, commit) in start order, so this
+        is O(n log n). Findings without a span are always kept. Input order is
+        preserved.
+        """
+        last_end: dict[tuple[str, str, str], int] = {}
+        dropped: set[int] = set()
+        spanned = sorted(
+            (f.start, -f.end, i)
+            for i, f in enumerate(findings)
+            if f.start is not None and f.end is not None
+        )
+        for start, neg_end, i in spanned:
+            f = findings[i]
+            key = (f.pattern_name, f.file_path, f.commit_hash)
+            if start < last_end.get(key, -1):
+                dropped.add(i)
+            else:
+                last_end[key] = -neg_end
+        if not dropped:
+            return findings
+        return [f for i, f in enumerate(findings) if i not in dropped]
+
+
+# The same secret (and the same line around it) usually recurs in many commits
+@functools.lru_cache(maxsize=8192)
 def redact_secret(text: str, visible_chars: int = 4) -> str:
     """Redact a secret with hash identifier for tracking."""
     # Generate short hash for tracking without exposing secret content
@@ -205,28 +435,111 @@ def redact_secret(text: str, visible_chars: int = 4) -> str:
     return f"***[{text_hash}]"
 
 
-def scan_content(
-    content: str,
-    file_path: str = "",
-    commit_hash: str = "",
+def redact_spans(
+    buf: bytearray,
+    spans: Iterable[tuple[int, int]],
+    mask: bytes = b"*",
+) -> None:
+    """Mask buf[start:end] in place for each span; the buffer length never changes."""
+    with memoryview(buf) as view:
+        for start, end in spans:
+            length = end - start
+            if length > 0:
+                view[start:end] = (mask * (length // len(mask) + 1))[:length]
+
+
+def redact_findings(content: str, findings: Iterable[SecretFinding], mask: str = "*") -> str:
+    """Return content with the span of every finding masked out."""
+    spans = sorted((f.start, f.end) for f in findings if f.start is not None and f.end is not None)
+    if content.isascii():
+        # Character offsets are byte offsets: mask in one buffer
+        buf = bytearray(content, "ascii")
+        redact_spans(buf, spans, mask.encode())
+        return buf.decode("ascii")
+
+    parts = []
+    pos = 0
+    for start, end in spans:
+        start = max(start, pos)
+        if end > start:
+            parts.append(content[pos:start])
+            parts.append((mask * (end - start))[: end - start])
+            pos = end
+    parts.append(content[pos:])
+    return "".join(parts)
+
+
+def _text(value: AnyStr) -> str:
+    """value as text; bytes that aren't valid UTF-8 decode with replacement characters."""
+    return value.decode(errors="replace") if isinstance(value, bytes) else value
+
+
+def _find_secrets(
+    content: AnyStr,
+    file_path: str,
+    commit_hash: str,
+    pos: int = 0,
+    endpos: int | None = None,
+    line_base: int = 0,
+    offset_base: int = 0,
+    include_context: bool = True,
+    resume: dict[str, int] | None = None,
 ) -> list[SecretFinding]:
-    """Scan content for secrets."""
-    if not isinstance(content, str):
+    """
+    Find secrets starting in content[pos:endpos] (matches may extend past endpos).
+
+    ``resume`` maps pattern names to the offset where each one's previous scan
+    stopped (relative to ``offset_base``); it is read and advanced in place.
+    """
+    # Cheap substring tests rule out clean content, and then single patterns,
+    # before any regex runs
+    present = _present_anchors(content, pos)
+    if present is not None and not present:
+        return []
+    # No pattern can match before the leftmost candidate
+    scan_start = _first_candidate(content, pos, endpos)
+    if scan_start is None:
         return []
 
+    if isinstance(content, bytes):
+        newline, space = b"\n", b" "
+    else:
+        newline, space = "\n", " "
     findings = []
-
-    for pattern in SECRET_PATTERNS:
-        for match in pattern.pattern.finditer(content):
-            matched_text = match.group(0)
-
+    # Newlines before scan_start; each pattern's matches come in order, so line
+    # numbers are counted onward from the previous match, not from the top
+    scan_start_line = line_base + content.count(newline, 0, scan_start) + 1
+
+    for pattern, regex, prefix, anchors in _rules(content):
+        if present is not None and present.isdisjoint(anchors):
+            continue
+        # Matches start in [scan_start, endpos), and so does the prefix of each one
+        if (
+            prefix
+            and content.find(prefix, scan_start, None if endpos is None else endpos + len(prefix))
+            < 0
+        ):
+            continue
+        start_at = scan_start
+        if resume is not None:
+            # Never restart inside a match an earlier window already reported
+            start_at = max(start_at, resume.get(pattern.name, 0) - offset_base)
+        line_number, line_pos = scan_start_line, scan_start
+        for match in regex.finditer(content, start_at):
+            if endpos is not None and match.start() >= endpos:
+                break
+            if resume is not None:
+                resume[pattern.name] = offset_base + match.end()
             # Get line number
-            line_number = content[: match.start()].count("\n") + 1
+            line_number += content.count(newline, line_pos, match.start())
+            line_pos = match.start()
 
             # Get context (surrounding text)
-            start = max(0, match.start() - 20)
-            end = min(len(content), match.end() + 20)
-            context = content[start:end].replace("\n", " ")
+            context = None
+            if include_context:
+                start = max(0, match.start() - 20)
+                end = min(len(content), match.end() + 20)
+                context = redact_secret(_text(content[start:end].replace(newline, space)), 10)
 
             findings.append(
                 SecretFinding(
@@ -236,41 +549,123 @@ def scan_content(
                     file_path=file_path,
                     commit_hash=commit_hash,
                     line_number=line_number,
-                    matched_text=redact_secret(matched_text),
-                    context=redact_secret(context, 10),
+                    matched_text=redact_secret(_text(match.group(0))),
+                    context=context,
+                    start=offset_base + match.start(),
+                    end=offset_base + match.end(),
                 )
             )
 
     return findings
 
 
+def scan_content(
+    content: str | bytes,
+    file_path: str = "",
+    commit_hash: str = "",
+    include_context: bool = True,
+) -> list[SecretFinding]:
+    """
+    Scan content for secrets.
+
+    Bytes (e.g. git blobs) are scanned without decoding them first; offsets and
+    line numbers then count bytes, and case-insensitive rules fold ASCII only.
+    Pass include_context=False to leave ``context`` unset when it isn't shown.
+    """
+    # One call per type, so _find_secrets is checked for str and bytes alike
+    if isinstance(content, str):
+        return _find_secrets(content, file_path, commit_hash, include_context=include_context)
+    if isinstance(content, bytes):
+        return _find_secrets(content, file_path, commit_hash, include_context=include_context)
+    return []
+
+
+def scan_stream(
+    reader: TextIO,
+    file_path: str = "",
+    commit_hash: str = "",
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    overlap: int = STREAM_OVERLAP,
+) -> list[SecretFinding]:
+    """
+    Scan a text stream for secrets without reading it into memory at once.
+
+    Consecutive windows share ``overlap`` characters so a secret spanning a
+    chunk boundary is still matched whole. Matches that start inside the
+    overlap are deferred to the next window, and each pattern resumes after
+    its last match, so the findings are the same as from scan_content as long
+    as every secret fits in the overlap. A longer secret may still be matched
+    again from the next window; those repeats are merged away per rule.
+    """
+    findings: list[SecretFinding] = []
+    resume: dict[str, int] = {}  # Stream offset where each pattern's scan stopped
+    window = reader.read(chunk_size)
+    pos = 0  # Scan start within window
+    line_base = 0  # Newlines preceding window[0]
+    offset_base = 0  # Stream offset of window[0]
+
+    while window:
+        chunk = reader.read(chunk_size)
+        if not chunk:
+            findings.extend(
+                _find_secrets(
+                    window, file_path, commit_hash, pos, None, line_base, offset_base, resume=resume
+                )
+            )
+            break
+
+        cut = len(window) - overlap
+        if cut > pos:
+            findings.extend(
+                _find_secrets(
+                    window, file_path, commit_hash, pos, cut, line_base, offset_base, resume=resume
+                )
+            )
+            # Keep one character before the cut so "^" still sees the real
+            # preceding text, then resume scanning right after it
+            keep = cut - 1
+            line_base += window.count("\n", 0, keep)
+            offset_base += keep
+            window = window[keep:]
+            pos = 1
+        window += chunk
+
+    return SecretFinding.merge(findings)
+
+
+@functools.cache
+def _sensitive_file_matchers() -> tuple[frozenset[str], Pattern[str]]:
+    """SENSITIVE_FILES as (exact names, one regex for the globs), built on first use."""
+    # Same case handling as fnmatch.fnmatch
+    patterns = [os.path.normcase(p) for p in SENSITIVE_FILES]
+    exact = frozenset(p for p in patterns if not any(c in p for c in "*?["))
+    globs = "|".join(fnmatch.translate(p) for p in patterns if p not in exact)
+    return exact, re.compile(globs or "(?!)")
+
+
 def is_sensitive_file(file_path: str) -> bool:
     """Check if a file path matches sensitive file patterns."""
-    name = Path(file_path).name
+    exact, globs = _sensitive_file_matchers()
+    name = os.path.normcase(os.path.basename(file_path))
+    # A glob-free entry can only match the whole path if it matches the name
+    if name in exact:
+        return True
+    return bool(globs.match(name) or globs.match(os.path.normcase(file_path)))
 
-    for pattern in SENSITIVE_FILES:
-        if fnmatch.fnmatch(name, pattern):
-            return True
-        if fnmatch.fnmatch(file_path, pattern):
-            return True
 
-    return False
+# Risk by file extension, for files not matched by SENSITIVE_FILES
+_EXT_RISK = {
+    **dict.fromkeys((".pem", ".key", ".p12", ".pfx", ".env"), "high"),
+    **dict.fromkeys((".json", ".yml", ".yaml", ".xml", ".conf", ".cfg"), "medium"),
+}
 
 
 def get_file_risk_level(file_path: str) -> str:
     """Get risk level for a file path."""
-    if is_sensitive_file(file_path):
-        return "high"
-
-    # Check extensions
-    high_risk_extensions = [".pem", ".key", ".p12", ".pfx", ".env"]
-    medium_risk_extensions = [".json", ".yml", ".yaml", ".xml", ".conf", ".cfg"]
-
-    ext = "." + file_path.rsplit(".", 1)[-1] if "." in file_path else ""
-
-    if ext in high_risk_extensions:
+    name = file_path.rpartition("/")[2]
+    dot = name.rfind(".")
+    risk = _EXT_RISK.get(name[dot:].lower()) if dot >= 0 else None
+    # The extension alone decides "high" without the glob match
+    if risk == "high" or is_sensitive_file(file_path):
         return "high"
-    if ext in medium_risk_extensions:
-        return "medium"
-
-    return "low"
+    return risk or "low"
@@ -11,7 +11,14 @@ from mcp.server.stdio import stdio_server
 from mcp.types import TextContent, Tool
 
 from .adapter import FilterResult, GitFilterRepoAdapter
-from .ai_engine import AICommitEngine, AIConnectionError, MessageStyle, get_provider
+from .ai_engine import (
+    AICommitEngine,
+    AIConnectionError,
+    MessageStyle,
+    RewriteCache,
+    close_shared_clients,
+    get_provider,
+)
 from .config import get_config
 from .tools import TOOL_DEFINITIONS
 
@@ -22,6 +29,10 @@ logger = logging.getLogger(__name__)
 
 server = Server("git-filter-repo-mcp")
 
+# Shared across tool calls so re-running a rewrite reuses earlier answers; keyed
+# by the (cache_ttl, cache_path) it was built from
+_rewrite_cache: tuple[tuple[float, str | None], RewriteCache] | None = None
+
 
 def result_to_dict(result: FilterResult) -> dict:
     """FilterResult -> dict"""
@@ -32,6 +43,23 @@ def result_to_dict(result: FilterResult) -> dict:
     }
 
 
+def _get_rewrite_cache() -> RewriteCache | None:
+    """Rewrite cache for the current config, or None when caching is disabled."""
+    global _rewrite_cache
+    ai_config = get_config().ai
+    settings = (ai_config.cache_ttl, ai_config.cache_path)
+    if _rewrite_cache is not None and _rewrite_cache[0] != settings:
+        # Closing only drops the SQLite file; a running rewrite still has the
+        # in-memory entries
+        _rewrite_cache[1].close()
+        _rewrite_cache = None
+    if ai_config.cache_ttl <= 0:
+        return None
+    if _rewrite_cache is None:
+        _rewrite_cache = settings, RewriteCache(ttl=ai_config.cache_ttl, path=ai_config.cache_path)
+    return _rewrite_cache[1]
+
+
 def create_adapter(repo_path: str) -> GitFilterRepoAdapter:
     """Create adapter with proper error handling."""
     return GitFilterRepoAdapter(repo_path)
@@ -80,6 +108,7 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
 async def _execute_tool(name: str, args: dict[str, Any]) -> dict:
     """Execute tool."""
     logger.info(f"tool: {name}")
+    config = get_config()  # Cheap unless a config file changed
     dry_run = args.get("dry_run", config.server.default_dry_run)
 
     if name == "analyze_git_history":
@@ -110,8 +139,15 @@ async def _execute_tool(name: str, args: dict[str, Any]) -> dict:
                 if ai_provider_name == "openai"
                 else config.ai.anthropic_api_key,
                 base_url=config.ai.ollama_base_url,
+                max_connections=config.ai.max_connections,
+                model_tiers=config.ai.model_tiers,
+            )
+            engine = AICommitEngine(
+                provider,
+                style,
+                cache=_get_rewrite_cache(),
+                max_inflight=config.ai.max_inflight,
             )
-            engine = AICommitEngine(provider, style)
 
             try:
                 if hasattr(provider, "check_connection"):
@@ -123,16 +159,15 @@ async def _execute_tool(name: str, args: dict[str, Any]) -> dict:
                             "ai_provider": ai_provider_name,
                         }
 
-                async def ai_callback(message: str, commit_hash: str) -> str:
-                    files = adapter.get_commit_files(commit_hash)
-                    result = await engine.rewrite_message(message, commit_hash, files)
-                    return result.rewritten
-
                 commits = adapter.get_commits(args.get("branch", "HEAD"))
+                files = adapter.get_many_commit_files(commit.hash for commit in commits)
+                results = await engine.rewrite_batch(
+                    [(commit.hash, commit.message, files[commit.hash]) for commit in commits]
+                )
                 rewrites = []
 
-                for commit in commits:
-                    new_message = await ai_callback(commit.message, commit.hash)
+                for commit, result in zip(commits, results):
+                    new_message = result.rewritten
                     if new_message != commit.message:
                         rewrites.append(
                             {
@@ -289,8 +324,12 @@ async def _execute_tool(name: str, args: dict[str, Any]) -> dict:
                     if ai_provider_name == "openai"
                     else config.ai.anthropic_api_key,
                     base_url=config.ai.ollama_base_url,
+                    max_connections=config.ai.max_connections,
+                    model_tiers=config.ai.model_tiers,
+                )
+                engine = AICommitEngine(
+                    provider, MessageStyle.CONVENTIONAL, cache=_get_rewrite_cache()
                 )
-                engine = AICommitEngine(provider, MessageStyle.CONVENTIONAL)
                 try:
                     if hasattr(provider, "check_connection"):
                         connected, status = await provider.check_connection()
@@ -391,7 +430,14 @@ async def _execute_tool(name: str, args: dict[str, Any]) -> dict:
         try:
             adapter = create_adapter(args["repo_path"])
             backup = adapter.create_backup() if config.server.auto_backup and not dry_run else None
-            result = adapter.replace_text_in_history(args["old_text"], args["new_text"], args.get("file_pattern"), dry_run, not dry_run)
+            result = adapter.replace_text_in_history(
+                args["old_text"],
+                args["new_text"],
+                args.get("file_pattern"),
+                dry_run,
+                not dry_run,
+                regex=args.get("regex", False),
+            )
             response = result_to_dict(result)
             if backup:
                 response["backup_branch"] = backup
@@ -446,6 +492,16 @@ async def _execute_tool(name: str, args: dict[str, Any]) -> dict:
     return {"error": f"Unknown tool: {name}"}
 
 
+def install_fast_event_loop() -> bool:
+    """Use uvloop's event loop if installed. Must run before asyncio.run()."""
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
 async def run_server():
     """Run MCP server."""
     logger.info("server starting")
@@ -460,10 +516,14 @@ async def run_server():
     except Exception as e:
         logger.exception("server error")
         raise
+    finally:
+        await close_shared_clients()
 
 
 def main():
     """Entry point."""
+    if install_fast_event_loop():
+        logger.info("using uvloop")
     try:
         asyncio.run(run_server())
     except KeyboardInterrupt:
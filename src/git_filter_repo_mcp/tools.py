@@ -155,6 +155,9 @@ class ReplaceTextInput(BaseModel):
     file_pattern: str | None = Field(
         default=None, description="Glob pattern to filter files (e.g., '*.py')"
     )
+    regex: bool = Field(
+        default=False, description="If true, treat old_text as a Python regular expression"
+    )
     dry_run: bool = Field(default=True, description="If true, only show what would be changed")
 
 
@@ -1,17 +1,30 @@
 """AI engine tests."""
 
+import asyncio
+import json
+
+import httpx
 import pytest
 
+from git_filter_repo_mcp import ai_engine
 from git_filter_repo_mcp.ai_engine import (
     AICommitEngine,
     AIConnectionError,
     AnthropicProvider,
+    CircuitBreaker,
     CommitContext,
+    FallbackProvider,
     MessageStyle,
     OllamaProvider,
     OpenAIProvider,
+    RewriteCache,
+    RewriteResult,
     build_prompt,
+    build_prompt_parts,
+    clear_provider_cache,
+    close_shared_clients,
     get_provider,
+    get_shared_client,
 )
 
 
@@ -53,6 +66,57 @@ class TestOllamaProvider:
         result = provider._parse_response("feat: add new feature", MessageStyle.CONVENTIONAL)
         assert result == "feat: add new feature"
 
+    def test_parse_response_conventional_prefix_case_insensitive(self):
+        provider = OllamaProvider()
+        assert provider._parse_response("FIX: crash", MessageStyle.CONVENTIONAL) == "FIX: crash"
+        assert (
+            provider._parse_response("fixed crash", MessageStyle.CONVENTIONAL)
+            == "chore: fixed crash"
+        )
+
+    async def test_generate_streams_first_line(self):
+        chunks = ["\n", "feat: add", " login\n", "\nMore detail", ""]
+        body = "\n".join(json.dumps({"response": c, "done": not c}) for c in chunks).encode()
+        sent = []
+
+        def handler(request):
+            sent.append(json.loads(request.content))
+            return httpx.Response(200, content=body)
+
+        provider = OllamaProvider()
+        provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        context = CommitContext(
+            original_message="add login", commit_hash="abc123", files_changed=[]
+        )
+        assert (
+            await provider.generate_message(context, MessageStyle.CONVENTIONAL) == "feat: add login"
+        )
+        detailed = await provider.generate_message(context, MessageStyle.DETAILED)
+        await provider.close()
+
+        assert detailed == "feat: add login\n\nMore detail"
+        assert sent[0]["stream"] is True
+        assert sent[0]["system"] == ai_engine.PROMPT_INSTRUCTIONS[MessageStyle.CONVENTIONAL]
+        assert sent[0]["prompt"].startswith('Original commit message: "add login"')
+
+    async def test_malformed_stream_line(self):
+        body = json.dumps({"response": "feat: a", "done": False}).encode() + b"\n{not json\n"
+        context = CommitContext(
+            original_message="add login", commit_hash="abc123", files_changed=[]
+        )
+        for raise_on_error in (True, False):
+            provider = OllamaProvider(raise_on_error=raise_on_error)
+            provider._client = httpx.AsyncClient(
+                transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+            )
+            if raise_on_error:
+                with pytest.raises(AIConnectionError, match="Malformed"):
+                    await provider.generate_message(context, MessageStyle.SIMPLE)
+            else:
+                assert await provider.generate_message(context, MessageStyle.SIMPLE) == "add login"
+                assert provider._last_error
+            await provider.close()
+
     def test_parse_response_strips_quotes(self):
         provider = OllamaProvider()
         result = provider._parse_response('"some message"', MessageStyle.SIMPLE)
@@ -99,6 +163,80 @@ class TestAnthropicProvider:
         assert "test message" in prompt
         assert "file.py" in prompt
 
+    async def test_instructions_sent_as_cached_system_block(self):
+        sent = []
+
+        def handler(request):
+            sent.append(json.loads(request.content))
+            return httpx.Response(200, json={"content": [{"text": "feat: x"}]})
+
+        provider = AnthropicProvider(api_key="test-key")
+        provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        for message in ("first", "second"):
+            context = CommitContext(
+                original_message=message, commit_hash="abc123", files_changed=[]
+            )
+            assert await provider.generate_message(context, MessageStyle.CONVENTIONAL) == "feat: x"
+        await provider.close()
+
+        assert sent[0]["system"] == sent[1]["system"]
+        assert sent[0]["system"][0]["cache_control"] == {"type": "ephemeral"}
+        assert "first" in sent[0]["messages"][0]["content"]
+
+
+class TestOpenAIBatch:
+    async def test_one_request_for_many_commits(self):
+        sent = []
+
+        def handler(request):
+            body = json.loads(request.content)
+            sent.append(body)
+            reply = {"messages": ["feat: one", '"fix: two"']}
+            return httpx.Response(
+                200, json={"choices": [{"message": {"content": json.dumps(reply)}}]}
+            )
+
+        provider = OpenAIProvider(api_key="test-key")
+        provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        contexts = [CommitContext("one", "h1", []), CommitContext("two", "h2", ["a.py"])]
+        assert await provider.generate_messages_batch(contexts, MessageStyle.CONVENTIONAL) == [
+            "feat: one",
+            "fix: two",
+        ]
+        await provider.close()
+
+        assert len(sent) == 1
+        assert sent[0]["response_format"] == {"type": "json_object"}
+        assert "[2]" in sent[0]["messages"][1]["content"]
+
+    def test_parse_batch_reply_rejects_wrong_count(self):
+        assert ai_engine._parse_batch_reply('```json\n{"messages": ["a"]}\n```', 1) == ["a"]
+        for text in ('{"messages": ["a"]}', "[]", "no json"):
+            with pytest.raises(ValueError):
+                ai_engine._parse_batch_reply(text, 2)
+
+
+class TestBuildPromptParts:
+    def test_instructions_independent_of_commit(self):
+        first = CommitContext(original_message="a", commit_hash="1", files_changed=["b.py", "a.py"])
+        second = CommitContext(original_message="b", commit_hash="2", files_changed=[])
+        instructions, details = build_prompt_parts(first, MessageStyle.SIMPLE)
+        assert instructions is build_prompt_parts(second, MessageStyle.SIMPLE)[0]
+        assert "Files changed: b.py, a.py" in details
+        assert build_prompt(first, MessageStyle.SIMPLE).startswith(instructions)
+
+    def test_truncates_by_utf8_bytes(self):
+        files = [f"f{i:02d}.py" for i in range(25, 0, -1)]
+        diff = "é" * 400
+        context = CommitContext(
+            original_message="a", commit_hash="1", files_changed=files, diff_summary=diff
+        )
+        _, details = build_prompt_parts(context, MessageStyle.SIMPLE)
+        assert "Files changed: f25.py, f24.py" in details
+        assert "f16.py (+15 more)" in details
+        assert "é" * 250 in details
+        assert "é" * 251 not in details
+
 
 class TestGetProvider:
     def test_get_ollama_provider(self):
@@ -136,8 +274,246 @@ class TestGetProvider:
         with pytest.raises(ValueError, match="Unknown provider"):
             get_provider("unknown")
 
+    def test_model_tiers(self):
+        provider = get_provider("ollama", model_tiers={"simple": "llama3.2:1b"})
+        assert provider.model_for(MessageStyle.SIMPLE) == "llama3.2:1b"
+        assert provider.model_for(MessageStyle.DETAILED) == "llama3.2"
+        assert get_provider("ollama", model_tiers={"simple": "llama3.2:1b"}) is provider
+        assert get_provider("ollama") is not provider
+
+    def test_provider_reused_for_same_settings(self):
+        provider = get_provider("openai", api_key="test-key", model="gpt-4")
+        assert get_provider("openai", api_key="test-key", model="gpt-4") is provider
+        assert get_provider("openai", api_key="other-key", model="gpt-4") is not provider
+        assert get_provider("openai", api_key="test-key") is not provider
+
+        clear_provider_cache()
+        assert get_provider("openai", api_key="test-key", model="gpt-4") is not provider
+
+
+_PAYLOAD = {"model": "m", "messages": [{"role": "user", "content": "caf\u00e9 \u2713"}]}
+
+
+class TestJsonCodec:
+    def test_round_trip(self):
+        body = ai_engine._encode_json(_PAYLOAD)
+        assert isinstance(body, bytes)
+        assert json.loads(body) == _PAYLOAD
+        assert ai_engine._decode_json(body) == _PAYLOAD
+
+    def test_stdlib_fallback(self, monkeypatch):
+        monkeypatch.setattr(ai_engine, "orjson", None)
+        body = ai_engine._encode_json(_PAYLOAD)
+        assert body == json.dumps(_PAYLOAD, separators=(",", ":"), ensure_ascii=False).encode()
+        assert ai_engine._decode_json(body) == _PAYLOAD
+
+
+class TestSharedClient:
+    async def test_providers_share_client(self):
+        ollama = get_provider("ollama")
+        openai = get_provider("openai", api_key="test-key")
+        assert ollama.client is openai.client is get_shared_client()
+        await close_shared_clients()
+
+    async def test_provider_close_keeps_shared_client(self):
+        provider = get_provider("anthropic", api_key="test-key")
+        client = provider.client
+        await provider.close()
+        assert not client.is_closed
+        await close_shared_clients()
+        assert client.is_closed
+
+    async def test_shared_client_per_loop(self):
+        other = await asyncio.to_thread(asyncio.run, self._client_in_new_loop())
+        assert other is not get_shared_client()
+        await close_shared_clients()
+
+    @staticmethod
+    async def _client_in_new_loop():
+        client = get_shared_client()
+        await close_shared_clients()
+        return client
+
+    async def test_shared_client_per_pool_size(self):
+        small = get_provider("ollama", max_connections=4)
+        assert small.client is get_shared_client(4)
+        assert small.client is not get_shared_client()
+        assert get_provider("ollama", max_connections=4) is small
+        await close_shared_clients()
+
+    def test_own_client_by_default(self):
+        provider = OpenAIProvider(api_key="test-key")
+        assert provider.client.headers["authorization"] == "Bearer test-key"
+
+
+class _SlowProvider:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def generate_message(self, context, style):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return context.original_message.upper()
+
+
+class _BatchProvider(_SlowProvider):
+    def __init__(self, fail=False):
+        super().__init__()
+        self.batches = []
+        self.fail = fail
+
+    async def generate_messages_batch(self, contexts, style):
+        self.batches.append(len(contexts))
+        if self.fail:
+            raise AIConnectionError("Test", "bad reply")
+        return [c.original_message.title() for c in contexts]
+
 
 class TestAICommitEngine:
+    async def test_rewrite_batch_concurrent(self):
+        provider = _SlowProvider()
+        engine = AICommitEngine(provider)
+        results = await engine.rewrite_batch([(f"h{i}", f"msg {i}", []) for i in range(5)])
+        assert [r.rewritten for r in results] == [f"MSG {i}" for i in range(5)]
+        assert [r.commit_hash for r in results] == [f"h{i}" for i in range(5)]
+        assert provider.peak == 5
+
+    async def test_rewrite_batch_bounded(self):
+        provider = _SlowProvider()
+        engine = AICommitEngine(provider, max_inflight=2)
+        results = await engine.rewrite_batch([(f"h{i}", f"msg {i}", []) for i in range(6)])
+        assert [r.commit_hash for r in results] == [f"h{i}" for i in range(6)]
+        assert provider.peak == 2
+
+    async def test_rewrite_batch_packs_commits(self, monkeypatch):
+        monkeypatch.setattr(ai_engine, "PROMPT_BATCH_SIZE", 2)
+        commits = [(f"h{i}", f"msg {i}", []) for i in range(5)]
+        provider = _BatchProvider()
+        results = await AICommitEngine(provider).rewrite_batch(commits)
+        assert [r.rewritten for r in results] == [f"Msg {i}" for i in range(5)]
+        assert provider.batches == [2, 2, 1]
+        assert provider.calls == 0
+
+        # A failed batch falls back to one request per commit
+        provider = _BatchProvider(fail=True)
+        results = await AICommitEngine(provider).rewrite_batch(commits)
+        assert [r.rewritten for r in results] == [f"MSG {i}" for i in range(5)]
+        assert provider.calls == 5
+
+    async def test_batch_fallback_bounded(self):
+        provider = _BatchProvider(fail=True)
+        engine = AICommitEngine(provider, max_inflight=3)
+        results = await engine.rewrite_batch([(f"h{i}", f"msg {i}", []) for i in range(40)])
+        assert [r.rewritten for r in results] == [f"MSG {i}" for i in range(40)]
+        assert provider.calls == 40
+        assert provider.peak == 3
+
+    async def test_rewrite_batch_cancels_on_error(self):
+        started = []
+
+        class FailingProvider:
+            async def generate_message(self, context, style):
+                started.append(context.commit_hash)
+                if context.commit_hash == "bad":
+                    raise AIConnectionError("Test", "down")
+                await asyncio.sleep(10)
+
+        engine = AICommitEngine(FailingProvider())
+        tasks_before = asyncio.all_tasks()
+        with pytest.raises(AIConnectionError):
+            await engine.rewrite_batch([("slow", "m1", []), ("bad", "m2", [])])
+        await asyncio.sleep(0)
+        assert sorted(started) == ["bad", "slow"]
+        assert asyncio.all_tasks() == tasks_before
+
+    async def test_identical_requests_coalesce(self):
+        provider = _SlowProvider()
+        engine = AICommitEngine(provider)
+        results = await engine.rewrite_batch(
+            [(f"h{i}", "wip", []) for i in range(4)] + [("h4", "fix", [])]
+        )
+        assert [r.rewritten for r in results] == ["WIP"] * 4 + ["FIX"]
+        assert [r.commit_hash for r in results] == [f"h{i}" for i in range(5)]
+        assert provider.calls == 2
+        assert engine._inflight == {}
+
+    async def test_coalesced_failure_propagates(self):
+        class FailingProvider:
+            calls = 0
+
+            async def generate_message(self, context, style):
+                self.calls += 1
+                await asyncio.sleep(0.01)
+                raise AIConnectionError("Test", "down")
+
+        provider = FailingProvider()
+        engine = AICommitEngine(provider)
+        context = CommitContext("wip", "h1", [])
+        results = await asyncio.gather(
+            engine.rewrite(context), engine.rewrite(context), return_exceptions=True
+        )
+        assert all(isinstance(r, AIConnectionError) for r in results)
+        assert provider.calls == 1
+        assert engine._inflight == {}
+
+    async def test_rewrite_many_bounded(self):
+        provider = _SlowProvider()
+        engine = AICommitEngine(provider, max_inflight=2)
+        contexts = [CommitContext(f"msg {i}", f"h{i}", []) for i in range(6)]
+        results = [r async for r in engine.rewrite_many(contexts)]
+        assert sorted(r.commit_hash for r in results) == [f"h{i}" for i in range(6)]
+        assert provider.peak == 2
+
+    async def test_rewrite_many_keeps_going_on_error(self):
+        class FlakyProvider:
+            async def generate_message(self, context, style):
+                if context.commit_hash == "bad":
+                    raise AIConnectionError("Test", "down")
+                return "new"
+
+        engine = AICommitEngine(FlakyProvider())
+        contexts = [CommitContext("old", h, []) for h in ("good", "bad")]
+        results = {r.commit_hash: r async for r in engine.rewrite_many(contexts)}
+        assert results["good"].rewritten == "new"
+        assert results["good"].error is None
+        assert results["bad"].rewritten == "old"
+        assert "down" in results["bad"].error
+
+    async def test_callback_overlaps_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        provider = _SlowProvider()
+        callback = AICommitEngine(provider).create_callback()
+        try:
+            with ThreadPoolExecutor(4) as pool:
+                results = await asyncio.to_thread(
+                    lambda: list(
+                        pool.map(
+                            callback, [f"msg {i}" for i in range(4)], [f"h{i}" for i in range(4)]
+                        )
+                    )
+                )
+        finally:
+            callback.close()
+        assert results == [f"MSG {i}" for i in range(4)]
+        assert provider.peak > 1
+        assert callback._loop.is_closed()
+
+    def test_callback_close_closes_shared_clients(self):
+        async def open_client():
+            return ai_engine.get_shared_client()
+
+        callback = AICommitEngine(_SlowProvider()).create_callback()
+        client = asyncio.run_coroutine_threadsafe(open_client(), callback._loop).result()
+        callback.close()
+        assert client.is_closed
+        assert callback._loop not in ai_engine._shared_clients
+
     def test_init_default(self):
         engine = AICommitEngine()
         assert isinstance(engine.provider, OllamaProvider)
@@ -150,6 +526,146 @@ class TestAICommitEngine:
         assert engine.style == MessageStyle.GITMOJI
 
 
+class _StubProvider:
+    def __init__(self, reply=None, delay=0.0, error=None):
+        self.reply = reply
+        self.delay = delay
+        self.error = error
+        self.cancelled = False
+
+    async def generate_message(self, context, style):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise AIConnectionError("Stub", self.error)
+        return self.reply
+
+
+class TestFallbackProvider:
+    _context = CommitContext("fix bug", "abc123", [])
+
+    async def test_hedges_slow_provider(self):
+        slow, fast = _StubProvider("slow", delay=10), _StubProvider("fast")
+        provider = get_provider("fallback", providers=[slow, fast], stagger=0.01)
+        assert await provider.generate_message(self._context, MessageStyle.SIMPLE) == "fast"
+        await asyncio.sleep(0)
+        assert slow.cancelled
+
+    async def test_fails_over_without_waiting(self):
+        provider = FallbackProvider([_StubProvider(error="down"), _StubProvider("ok")], stagger=10)
+        result = await asyncio.wait_for(
+            provider.generate_message(self._context, MessageStyle.SIMPLE), 1
+        )
+        assert result == "ok"
+
+    async def test_cancelled_request_fails_over(self):
+        class _Cancelled:
+            async def generate_message(self, context, style):
+                raise asyncio.CancelledError
+
+        provider = FallbackProvider([_Cancelled(), _StubProvider("ok")], stagger=10)
+        result = await asyncio.wait_for(
+            provider.generate_message(self._context, MessageStyle.SIMPLE), 1
+        )
+        assert result == "ok"
+
+    async def test_all_failed(self):
+        provider = FallbackProvider([_StubProvider(error="down"), _StubProvider(error="also down")])
+        with pytest.raises(AIConnectionError, match="also down"):
+            await provider.generate_message(self._context, MessageStyle.SIMPLE)
+        assert provider._last_error
+
+    def test_needs_providers(self):
+        with pytest.raises(ValueError):
+            FallbackProvider([])
+        with pytest.raises(ValueError, match="Fallback providers required"):
+            get_provider("fallback")
+
+    def test_not_cached(self):
+        first = get_provider("fallback", providers=[_StubProvider("a")])
+        assert get_provider("fallback", providers=[_StubProvider("b")]) is not first
+
+
+class TestRewriteCache:
+    def _context(self, files=None, commit_hash="abc123"):
+        return CommitContext("fix bug", commit_hash, files or ["b.py", "a.py"])
+
+    def test_key_ignores_commit_hash_and_file_order(self):
+        key1 = RewriteCache.make_key(self._context(), MessageStyle.SIMPLE, "m")
+        key2 = RewriteCache.make_key(
+            self._context(["a.py", "b.py"], "def456"), MessageStyle.SIMPLE, "m"
+        )
+        assert key1 == key2
+        assert key1 != RewriteCache.make_key(self._context(), MessageStyle.GITMOJI, "m")
+        assert key1 != RewriteCache.make_key(self._context(), MessageStyle.SIMPLE, "other")
+
+    def test_lru_eviction(self):
+        cache = RewriteCache(max_entries=2)
+        for key in ("a", "b"):
+            cache.put(key, RewriteResult("x", "y", key))
+        cache.get("a")
+        cache.put("c", RewriteResult("x", "y", "c"))
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert len(cache) == 2
+
+    def test_expired_entry(self):
+        cache = RewriteCache()
+        cache.put("a", RewriteResult("x", "y", "a"), ttl=-1)
+        assert cache.get("a") is None
+
+    def test_persists_across_instances(self, tmp_path):
+        path = tmp_path / "cache" / "rewrites.sqlite"
+        cache = RewriteCache(path=path)
+        cache.put("a", RewriteResult("x", "y", "a"))
+        cache.put("old", RewriteResult("x", "y", "old"), ttl=-1)
+        cache.close()
+
+        reopened = RewriteCache(path=path)
+        assert reopened.get("a").rewritten == "y"
+        assert reopened.get("old") is None
+        reopened.clear()
+        reopened.close()
+        cleared = RewriteCache(path=path)
+        assert cleared.get("a") is None
+        cleared.close()
+
+    async def test_engine_reuses_result(self):
+        provider = _SlowProvider()
+        engine = AICommitEngine(provider, cache=RewriteCache())
+        first = await engine.rewrite_message("fix bug", "abc", ["a.py"])
+        second = await engine.rewrite_message("fix bug", "def", ["a.py"])
+        assert not first.from_cache
+        assert second.from_cache
+        assert second.rewritten == "FIX BUG"
+        assert second.commit_hash == "def"
+        assert provider.calls == 1
+
+    async def test_caches_per_call_outcome(self):
+        async def handler(request):
+            if b"add login" in request.content:
+                return httpx.Response(500)
+            await asyncio.sleep(0.01)  # Answers after the other call failed
+            return httpx.Response(200, json={"response": "fix: typo", "done": True})
+
+        provider = OllamaProvider(raise_on_error=False)
+        provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        cache = RewriteCache()
+        engine = AICommitEngine(provider, MessageStyle.SIMPLE, cache=cache)
+        rewritten, failed = await asyncio.gather(
+            engine.rewrite_message("typo", "def"), engine.rewrite_message("add login", "abc")
+        )
+        await provider.close()
+
+        assert failed.rewritten == "add login"
+        assert rewritten.rewritten == "fix: typo"
+        assert len(cache) == 1
+        assert (await engine.rewrite_message("typo", "ghi")).from_cache
+
+
 class TestMessageStyle:
     def test_values(self):
         assert MessageStyle.CONVENTIONAL.value == "conventional"
@@ -220,6 +736,49 @@ class TestProviderRaiseOnError:
         assert provider.raise_on_error is False
 
 
+class TestCircuitBreaker:
+    async def test_fails_fast_while_open(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(503)
+
+        provider = OpenAIProvider(api_key="test-key", raise_on_error=False)
+        provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        context = CommitContext(original_message="orig", commit_hash="abc", files_changed=[])
+        for _ in range(7):
+            assert await provider.generate_message(context, MessageStyle.SIMPLE) == "orig"
+        await provider.close()
+
+        assert len(calls) == 5
+        assert provider.breaker.is_open
+        assert provider._last_error == ai_engine.CIRCUIT_OPEN_MESSAGE
+
+    def test_probe_after_cooldown(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr(ai_engine.time, "monotonic", lambda: now[0])
+        outage = httpx.ConnectError("down")
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=30.0)
+        breaker.record_failure(outage)
+        assert breaker.allow()
+        breaker.record_failure(outage)
+        assert not breaker.allow()
+
+        now[0] += 30.0
+        assert breaker.allow()  # Probe
+        assert not breaker.allow()
+        breaker.record_success()
+        assert breaker.allow() and not breaker.is_open
+
+    def test_rejected_request_is_not_an_outage(self):
+        request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+        rejected = httpx.HTTPStatusError("bad", request=request, response=httpx.Response(400))
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.record_failure(rejected)
+        assert not breaker.is_open
+
+
 class TestProviderLastError:
     def test_ollama_last_error_initially_none(self):
         provider = OllamaProvider()
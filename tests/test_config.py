@@ -1,11 +1,16 @@
 """Tests for configuration management."""
 
+import json
+import os
+
 from git_filter_repo_mcp.config import (
     AIConfig,
     Config,
     ServerConfig,
+    _apply_config_dict,
     _apply_env_vars,
     get_config,
+    reload_config,
 )
 
 
@@ -25,6 +30,9 @@ class TestConfig:
         assert ai_config.provider == "ollama"
         assert ai_config.ollama_base_url == "http://localhost:11434"
         assert ai_config.openai_api_key is None
+        assert ai_config.cache_ttl == 3600
+        assert ai_config.max_inflight == 16
+        assert ai_config.max_connections == 100
 
     def test_server_config_defaults(self):
         server_config = ServerConfig()
@@ -61,6 +69,29 @@ class TestEnvVars:
         assert config.ai.ollama_base_url == "http://custom:11434"
 
 
+class TestConfigDict:
+    """Test applying config file contents."""
+
+    def test_known_keys_applied(self):
+        config = Config()
+        data = {
+            "ai": {"model": "gpt-4", "max_inflight": 4, "model_tiers": {"simple": "small"}},
+            "server": {"default_dry_run": False},
+        }
+        _apply_config_dict(config, data)
+        assert config.ai.model == "gpt-4"
+        assert config.ai.max_inflight == 4
+        assert config.server.default_dry_run is False
+        config.ai.model_tiers["detailed"] = "large"
+        assert data["ai"]["model_tiers"] == {"simple": "small"}
+
+    def test_unknown_keys_ignored(self):
+        config = Config()
+        _apply_config_dict(config, {"ai": {"bogus": 1}, "other": {"x": 2}})
+        assert not hasattr(config.ai, "bogus")
+        assert config == Config()
+
+
 class TestGetConfig:
     """Test config singleton."""
 
@@ -72,3 +103,38 @@ class TestGetConfig:
         config1 = get_config()
         config2 = get_config()
         assert config1 is config2
+
+    def test_get_config_reloads_changed_file(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        config_file = tmp_path / "config.json"
+        config_file.write_text(json.dumps({"ai": {"model": "first"}}))
+        os.utime(config_file, ns=(1_000_000_000, 1_000_000_000))
+        config1 = get_config()
+        assert config1.ai.model == "first"
+        assert get_config() is config1
+
+        config_file.write_text(json.dumps({"ai": {"model": "second"}}))
+        os.utime(config_file, ns=(2_000_000_000, 2_000_000_000))
+        assert get_config().ai.model == "second"
+
+    def test_reload_reuses_unchanged_file(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        config_file = tmp_path / "config.json"
+        config_file.write_text(json.dumps({"ai": {"model": "first"}}))
+        parses = []
+        load = json.load
+        monkeypatch.setattr(json, "load", lambda f: parses.append(f.name) or load(f))
+
+        assert reload_config().ai.model == "first"
+        assert reload_config().ai.model == "first"
+        assert parses.count("config.json") == 1
+
+        config_file.write_text(json.dumps({"ai": {"model": "second!"}}))
+        assert reload_config().ai.model == "second!"
+        assert parses.count("config.json") == 2
+
+    def test_reload_config_returns_fresh_instance(self):
+        config1 = get_config()
+        config2 = reload_config()
+        assert config2 is not config1
+        assert get_config() is config2
@@ -0,0 +1,68 @@
+"""Tests for the package facade."""
+
+import dataclasses
+import subprocess
+import sys
+
+import pytest
+
+import git_filter_repo_mcp
+
+
+class TestLazyExports:
+    """Test PEP 562 lazy re-exports."""
+
+    def test_all_names_resolve(self):
+        for name in git_filter_repo_mcp.__all__:
+            assert getattr(git_filter_repo_mcp, name) is not None
+
+    def test_resolves_to_submodule_object(self):
+        from git_filter_repo_mcp.secrets import scan_content
+
+        assert git_filter_repo_mcp.scan_content is scan_content
+
+    def test_unknown_attribute_raises(self):
+        with pytest.raises(AttributeError, match="does_not_exist"):
+            git_filter_repo_mcp.__getattr__("does_not_exist")
+
+    def test_dir_lists_exports(self):
+        assert set(git_filter_repo_mcp.__all__) <= set(dir(git_filter_repo_mcp))
+
+    def test_import_does_not_load_submodules(self):
+        code = (
+            "import sys, git_filter_repo_mcp;"
+            "print(any(m in sys.modules for m in ("
+            "'git_filter_repo_mcp.ai_engine', 'git_filter_repo_mcp.adapter', 'httpx')))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == "False"
+
+
+# Re-exported value types; configs stay mutable since loading fills them in place
+VALUE_TYPES = (
+    "FilterResult",
+    "CommitInfo",
+    "RewriteResult",
+    "CommitContext",
+    "SecretPattern",
+    "SecretFinding",
+)
+
+
+class TestValueTypes:
+    """Re-exported result dataclasses stay slotted and immutable."""
+
+    @pytest.mark.parametrize("name", VALUE_TYPES)
+    def test_slotted_and_frozen(self, name):
+        cls = getattr(git_filter_repo_mcp, name)
+        assert name in git_filter_repo_mcp.__all__
+        assert "__slots__" in cls.__dict__
+        assert cls.__dataclass_params__.frozen
+
+    def test_replace_instead_of_mutate(self):
+        result = git_filter_repo_mcp.FilterResult(success=True, message="ok")
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            result.message = "changed"
+        assert dataclasses.replace(result, message="changed").message == "changed"
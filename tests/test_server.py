@@ -1,14 +1,20 @@
 """Tests for MCP server."""
 
+import asyncio
 import json
+import sys
+import types
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from git_filter_repo_mcp import server
 from git_filter_repo_mcp.adapter import FilterResult
+from git_filter_repo_mcp.config import Config
 from git_filter_repo_mcp.server import (
     _execute_tool,
     call_tool,
+    install_fast_event_loop,
     list_tools,
     result_to_dict,
 )
@@ -64,6 +70,24 @@ class TestResultToDict:
         assert d["dry_run"] is True
 
 
+class TestInstallFastEventLoop:
+    """Test optional uvloop policy."""
+
+    def test_without_uvloop(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "uvloop", None)
+        assert install_fast_event_loop() is False
+
+    def test_with_uvloop(self, monkeypatch):
+        fake = types.ModuleType("uvloop")
+        fake.EventLoopPolicy = asyncio.DefaultEventLoopPolicy
+        monkeypatch.setitem(sys.modules, "uvloop", fake)
+        try:
+            assert install_fast_event_loop() is True
+            assert isinstance(asyncio.get_event_loop_policy(), asyncio.DefaultEventLoopPolicy)
+        finally:
+            asyncio.set_event_loop_policy(None)
+
+
 class TestListTools:
     """Test list_tools handler."""
 
@@ -418,3 +442,28 @@ class TestRewriteCommitMessages:
 
             assert "error" in result
             assert "manual_mappings" in result["error"]
+
+
+class TestRewriteCache:
+    """Test the rewrite cache shared across tool calls."""
+
+    def test_follows_config(self, tmp_path, monkeypatch):
+        config = Config()
+        monkeypatch.setattr(server, "get_config", lambda: config)
+        monkeypatch.setattr(server, "_rewrite_cache", None)
+
+        cache = server._get_rewrite_cache()
+        assert cache is server._get_rewrite_cache()
+        assert cache.ttl == config.ai.cache_ttl
+
+        config.ai.cache_path = str(tmp_path / "rewrites.db")
+        on_disk = server._get_rewrite_cache()
+        assert on_disk is not cache
+        assert on_disk._db is not None
+
+        config.ai.cache_ttl = 60
+        assert server._get_rewrite_cache().ttl == 60
+        assert on_disk._db is None  # Replaced caches are closed
+
+        config.ai.cache_ttl = 0
+        assert server._get_rewrite_cache() is None